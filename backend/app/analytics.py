@@ -0,0 +1,202 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, case, func
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from .models import BlogPost, PostViewRollup
+
+logger = logging.getLogger(__name__)
+
+HOUR = "hour"
+DAY = "day"
+BUCKET_SPANS = {HOUR: timedelta(hours=1), DAY: timedelta(days=1)}
+
+# Hourly buckets cover the 24h window with room to spare; older ones are folded into days
+HOURLY_RETENTION_HOURS = 48
+TRENDING_WINDOWS = {"24h": timedelta(hours=24), "7d": timedelta(days=7)}
+TRENDING_SIZE = 50
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def hour_start(epoch_hour: int) -> datetime:
+    return _EPOCH + timedelta(hours=epoch_hour)
+
+
+def _upsert_rollups(db: Session, rows: List[dict]):
+    """Add view counts to (post, granularity, bucket) rows, creating them as needed."""
+    if not rows:
+        return
+
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite_insert if dialect == "sqlite" else postgresql_insert
+        statement = insert(PostViewRollup)
+        statement = statement.on_conflict_do_update(
+            index_elements=["post_id", "granularity", "bucket_start"],
+            set_={"views": PostViewRollup.views + statement.excluded.views}
+        )
+        db.execute(statement, rows)
+        return
+
+    for row in rows:
+        existing = db.query(PostViewRollup).filter(
+            PostViewRollup.post_id == row["post_id"],
+            PostViewRollup.granularity == row["granularity"],
+            PostViewRollup.bucket_start == row["bucket_start"]
+        ).first()
+        if existing:
+            existing.views += row["views"]
+        else:
+            db.add(PostViewRollup(**row))
+
+
+class ViewRecorder:
+    """Per-post, per-hour view counters kept in memory and flushed to rollups in batches.
+
+    Recording a view is a dictionary increment. flush() writes the pending buckets
+    with one upsert and bumps BlogPost.view_count in the same transaction, then
+    recomputes the trending lists so the endpoint only reads precomputed results.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[Tuple[int, int], int] = defaultdict(int)
+        self._trending: Dict[str, List[Tuple[int, int]]] = {}
+        self.trending_computed_at: Optional[datetime] = None
+
+    def record(self, post_id: int, timestamp: Optional[float] = None):
+        epoch_hour = int(timestamp if timestamp is not None else time.time()) // 3600
+        with self._lock:
+            self._pending[(post_id, epoch_hour)] += 1
+
+    @property
+    def pending_views(self) -> int:
+        return sum(self._pending.values())
+
+    def flush(self, session_factory):
+        """Persist pending buckets, then refresh the precomputed trending lists."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, defaultdict(int)
+
+            if pending:
+                db = session_factory()
+                try:
+                    self._write(db, pending)
+                    db.commit()
+                except Exception:
+                    db.rollback()
+                    # Keep the counts for the next attempt rather than dropping them
+                    with self._lock:
+                        for key, views in pending.items():
+                            self._pending[key] += views
+                    raise
+                finally:
+                    db.close()
+
+            self.refresh_trending(session_factory)
+
+    def _write(self, db: Session, pending: Dict[Tuple[int, int], int]):
+        _upsert_rollups(db, [
+            {"post_id": post_id, "granularity": HOUR, "bucket_start": hour_start(epoch_hour), "views": views}
+            for (post_id, epoch_hour), views in pending.items()
+        ])
+
+        per_post: Dict[int, int] = defaultdict(int)
+        for (post_id, _), views in pending.items():
+            per_post[post_id] += views
+
+        posts = BlogPost.__table__
+        db.execute(
+            posts.update().where(posts.c.id == bindparam("post_id")).values(
+                view_count=func.coalesce(posts.c.view_count, 0) + bindparam("views")
+            ),
+            [{"post_id": post_id, "views": views} for post_id, views in per_post.items()]
+        )
+
+    def compact(self, session_factory, now: Optional[datetime] = None):
+        """Fold hourly buckets older than HOURLY_RETENTION_HOURS into daily buckets."""
+        cutoff = (now or datetime.utcnow()) - timedelta(hours=HOURLY_RETENTION_HOURS)
+        db = session_factory()
+        try:
+            hourly = db.query(
+                PostViewRollup.id, PostViewRollup.post_id, PostViewRollup.bucket_start, PostViewRollup.views
+            ).filter(
+                PostViewRollup.granularity == HOUR,
+                PostViewRollup.bucket_start < cutoff
+            ).all()
+
+            if not hourly:
+                return 0
+
+            daily: Dict[Tuple[int, datetime], int] = defaultdict(int)
+            for row in hourly:
+                day = row.bucket_start.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+                daily[(row.post_id, day)] += row.views
+
+            _upsert_rollups(db, [
+                {"post_id": post_id, "granularity": DAY, "bucket_start": day, "views": views}
+                for (post_id, day), views in daily.items()
+            ])
+            db.query(PostViewRollup).filter(
+                PostViewRollup.id.in_([row.id for row in hourly])
+            ).delete(synchronize_session=False)
+            db.commit()
+            return len(hourly)
+        finally:
+            db.close()
+
+    def refresh_trending(self, session_factory, now: Optional[datetime] = None):
+        """Recompute views per post over each trending window.
+
+        The bucket the window starts in only partly overlaps it, so its views count
+        in proportion to the overlap, as if spread evenly over the bucket. Without
+        that, the 7d window would take up to 23 extra hours from its first daily row.
+        """
+        now = now or datetime.utcnow()
+        db = session_factory()
+        try:
+            trending = {}
+            for window, span in TRENDING_WINDOWS.items():
+                since = now - span
+                totals: Dict[int, float] = defaultdict(float)
+                floors = {
+                    HOUR: since.replace(minute=0, second=0, microsecond=0),
+                    DAY: since.replace(hour=0, minute=0, second=0, microsecond=0),
+                }
+                for granularity, floor in floors.items():
+                    overlap = (floor + BUCKET_SPANS[granularity] - since) / BUCKET_SPANS[granularity]
+                    weight = case((PostViewRollup.bucket_start < since, overlap), else_=1.0)
+                    rows = db.query(
+                        PostViewRollup.post_id, func.sum(PostViewRollup.views * weight)
+                    ).filter(
+                        PostViewRollup.granularity == granularity,
+                        PostViewRollup.bucket_start >= floor
+                    ).group_by(PostViewRollup.post_id).all()
+                    for post_id, views in rows:
+                        totals[post_id] += float(views)
+                counts = [(post_id, round(views)) for post_id, views in totals.items()]
+                trending[window] = sorted(
+                    (item for item in counts if item[1] > 0), key=lambda item: (-item[1], item[0])
+                )[:TRENDING_SIZE]
+        finally:
+            db.close()
+
+        self._trending = trending
+        self.trending_computed_at = now
+
+    def trending(self, window: str) -> List[Tuple[int, int]]:
+        """(post id, views in window) pairs from the last refresh, most viewed first."""
+        return self._trending.get(window, [])
+
+
+view_recorder = ViewRecorder()
@@ -0,0 +1,305 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import zlib
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import DateTime, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+
+from .config import settings
+from .models import ArchivedGeneration, Generation
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 5000
+# Ids per "IN (...)" lookup in a partition file
+LOOKUP_CHUNK = 500
+_COLUMNS = [column.name for column in Generation.__table__.columns]
+_DATETIME_COLUMNS = {column.name for column in Generation.__table__.columns if isinstance(column.type, DateTime)}
+
+
+def partition_for(created_at: Optional[datetime]) -> str:
+    return (created_at or datetime.utcnow()).strftime("%Y-%m")
+
+
+def _encode(row) -> bytes:
+    values = {}
+    for name in _COLUMNS:
+        value = row[name]
+        values[name] = value.isoformat() if isinstance(value, datetime) else value
+    return zlib.compress(json.dumps(values, separators=(",", ":")).encode("utf-8"), 6)
+
+
+def _decode(payload: bytes) -> dict:
+    values = json.loads(zlib.decompress(payload))
+    for name in _DATETIME_COLUMNS:
+        if values.get(name):
+            values[name] = datetime.fromisoformat(values[name])
+    return values
+
+
+class GenerationArchive:
+    """Moves old, non-favorited generations out of the hot table into monthly archive files.
+
+    Each month is a separate SQLite file holding zlib-compressed JSON rows, so a
+    month can be copied, backed up or dropped on its own. The main database keeps
+    a small archived_generations row per generation recording its partition, which
+    is what makes rehydration on access and the include_archived history cheap: the
+    stub carries enough to list the generation, and the archive file is only opened
+    when one is requested.
+
+    Rows are written to the archive file and committed before they are removed from
+    the main database, so an interrupted run only leaves rows that the next run
+    archives again (the archive insert is idempotent).
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._dirty_partitions = set()
+
+    def _path(self, partition: str) -> str:
+        return os.path.join(self.directory, f"generations-{partition}.db")
+
+    def _connect(self, partition: str, create: bool = False) -> Optional[sqlite3.Connection]:
+        path = self._path(partition)
+        if not create and not os.path.exists(path):
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        connection = sqlite3.connect(path, timeout=30)
+        if create:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS generations ("
+                "id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, created_at TEXT, payload BLOB NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS ix_generations_user ON generations (user_id)")
+        return connection
+
+    def partitions(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            name[len("generations-"):-len(".db")] for name in os.listdir(self.directory)
+            if name.startswith("generations-") and name.endswith(".db")
+        )
+
+    def archive_old(self, session_factory, now: Optional[datetime] = None, older_than_days: Optional[int] = None) -> int:
+        """Archive every eligible generation in batches; returns how many were moved."""
+        days = settings.ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+        cutoff = (now or datetime.utcnow()) - timedelta(days=days)
+        table = Generation.__table__
+        moved = 0
+
+        with self._lock:
+            self._fill_stub_names(session_factory)
+            while True:
+                db = session_factory()
+                try:
+                    rows = db.execute(
+                        table.select().where(
+                            table.c.created_at < cutoff,
+                            or_(table.c.is_favorited == False, table.c.is_favorited.is_(None)),
+                            or_(table.c.rehydrated_at.is_(None), table.c.rehydrated_at < cutoff)
+                        ).order_by(table.c.created_at).limit(BATCH_SIZE)
+                    ).mappings().all()
+                    if not rows:
+                        return moved
+
+                    by_partition: Dict[str, list] = defaultdict(list)
+                    for row in rows:
+                        by_partition[partition_for(row["created_at"])].append(row)
+
+                    for partition, partition_rows in by_partition.items():
+                        connection = self._connect(partition, create=True)
+                        try:
+                            with connection:
+                                connection.executemany(
+                                    "INSERT OR REPLACE INTO generations (id, user_id, created_at, payload) VALUES (?, ?, ?, ?)",
+                                    [
+                                        (row["id"], row["user_id"],
+                                         row["created_at"].isoformat() if row["created_at"] else None, _encode(row))
+                                        for row in partition_rows
+                                    ]
+                                )
+                        finally:
+                            connection.close()
+
+                    db.execute(ArchivedGeneration.__table__.insert(), [
+                        {"id": row["id"], "user_id": row["user_id"], "partition": partition_for(row["created_at"]),
+                         "product_name": row["product_name"], "category": row["category"], "created_at": row["created_at"]}
+                        for row in rows
+                    ])
+                    db.execute(table.delete().where(table.c.id.in_([row["id"] for row in rows])))
+                    db.commit()
+                    moved += len(rows)
+                except Exception:
+                    db.rollback()
+                    raise
+                finally:
+                    db.close()
+
+    def rehydrate(self, db: Session, generation_id: int, user_id: int) -> Optional[Generation]:
+        """Move an archived generation back into the hot table; None if it is not archived."""
+        stub = db.query(ArchivedGeneration).filter(
+            ArchivedGeneration.id == generation_id,
+            ArchivedGeneration.user_id == user_id
+        ).first()
+        if stub is None:
+            return None
+
+        connection = self._connect(stub.partition)
+        if connection is None:
+            logger.error("Archive partition %s for generation %s is missing", stub.partition, generation_id)
+            return None
+        try:
+            row = connection.execute("SELECT payload FROM generations WHERE id = ?", (generation_id,)).fetchone()
+        finally:
+            connection.close()
+        if row is None:
+            # Either a concurrent rehydration already moved it back, or the archive lost it
+            generation = self._hot(db, generation_id, user_id)
+            if generation is None:
+                logger.error("Generation %s not found in archive partition %s", generation_id, stub.partition)
+            return generation
+
+        values = _decode(row[0])
+        values["rehydrated_at"] = datetime.utcnow()
+        generation = Generation(**values)
+        db.add(generation)
+        db.delete(stub)
+        try:
+            db.commit()
+        except (IntegrityError, StaleDataError):
+            # A concurrent request rehydrated the same generation first
+            db.rollback()
+            return self._hot(db, generation_id, user_id)
+
+        # The hot row is committed; the archived copy is now only a leftover to clean up
+        connection = self._connect(stub.partition)
+        try:
+            with connection:
+                connection.execute("DELETE FROM generations WHERE id = ?", (generation_id,))
+        finally:
+            connection.close()
+        self._dirty_partitions.add(stub.partition)
+
+        db.refresh(generation)
+        return generation
+
+    @staticmethod
+    def _hot(db: Session, generation_id: int, user_id: int) -> Optional[Generation]:
+        db.expire_all()
+        return db.query(Generation).filter(Generation.id == generation_id, Generation.user_id == user_id).first()
+
+    def _stored_values(self, stubs: List[ArchivedGeneration]) -> Dict[int, dict]:
+        """Decoded archived rows for the given stubs, keyed by id, reading each partition once."""
+        by_partition: Dict[str, List[int]] = defaultdict(list)
+        for stub in stubs:
+            by_partition[stub.partition].append(stub.id)
+
+        values = {}
+        for partition, ids in by_partition.items():
+            connection = self._connect(partition)
+            if connection is None:
+                continue
+            try:
+                for start in range(0, len(ids), LOOKUP_CHUNK):
+                    chunk = ids[start:start + LOOKUP_CHUNK]
+                    for generation_id, payload in connection.execute(
+                        f"SELECT id, payload FROM generations WHERE id IN ({','.join('?' * len(chunk))})", chunk
+                    ):
+                        values[generation_id] = _decode(payload)
+            finally:
+                connection.close()
+        return values
+
+    def _fill_stub_names(self, session_factory):
+        """Copy product name and category onto stubs archived before stubs carried them."""
+        db = session_factory()
+        try:
+            stubs = db.query(ArchivedGeneration).filter(ArchivedGeneration.product_name.is_(None)).all()
+            if not stubs:
+                return
+            values = self._stored_values(stubs)
+            for stub in stubs:
+                if stub.id in values:
+                    stub.product_name = values[stub.id]["product_name"]
+                    stub.category = values[stub.id]["category"]
+            db.commit()
+        finally:
+            db.close()
+
+    def list_archived(self, db: Session, user_id: int) -> List[Generation]:
+        """A user's archived generations as detached summaries, newest first, without opening the archive.
+
+        Only id, product name, category and created_at are filled in; the full row comes
+        back with rehydrate() when the generation itself is requested.
+        """
+        stubs = db.query(ArchivedGeneration).filter(
+            ArchivedGeneration.user_id == user_id
+        ).order_by(ArchivedGeneration.created_at.desc()).all()
+
+        # Stubs the archive job has not backfilled yet fall back to the archive file
+        unnamed = [stub for stub in stubs if stub.product_name is None]
+        stored = self._stored_values(unnamed) if unnamed else {}
+
+        generations = []
+        for stub in stubs:
+            product_name, category = stub.product_name, stub.category
+            if product_name is None:
+                if stub.id not in stored:
+                    continue
+                product_name, category = stored[stub.id]["product_name"], stored[stub.id]["category"]
+            generation = Generation(
+                id=stub.id, user_id=stub.user_id, product_name=product_name, category=category,
+                created_at=stub.created_at, is_favorited=False
+            )
+            generation.archived = True
+            generations.append(generation)
+        return generations
+
+    def load_archived(self, db: Session, user_id: int) -> List[Generation]:
+        """A user's archived generations as detached objects, newest first."""
+        partitions = [partition for (partition,) in db.query(ArchivedGeneration.partition).filter(
+            ArchivedGeneration.user_id == user_id
+        ).distinct()]
+
+        generations = []
+        for partition in partitions:
+            connection = self._connect(partition)
+            if connection is None:
+                continue
+            try:
+                for (payload,) in connection.execute("SELECT payload FROM generations WHERE user_id = ?", (user_id,)):
+                    generation = Generation(**_decode(payload))
+                    generation.archived = True
+                    generations.append(generation)
+            finally:
+                connection.close()
+
+        generations.sort(key=lambda generation: (generation.created_at is not None, generation.created_at), reverse=True)
+        return generations
+
+    def compact(self, partitions: Optional[Iterable[str]] = None):
+        """VACUUM partitions that lost rows to rehydration, returning the space to the filesystem."""
+        with self._lock:
+            targets = set(partitions) if partitions is not None else self._dirty_partitions
+            self._dirty_partitions = set() if partitions is None else self._dirty_partitions - targets
+            for partition in sorted(targets):
+                connection = self._connect(partition)
+                if connection is None:
+                    continue
+                try:
+                    connection.execute("VACUUM")
+                finally:
+                    connection.close()
+
+
+generation_archive = GenerationArchive(settings.ARCHIVE_DIR)
@@ -8,6 +8,8 @@ from sqlalchemy.orm import Session
 import os
 from dotenv import load_dotenv
 from .database import get_db
+from .config import settings
+from .profiling import phase
 
 load_dotenv()
 
@@ -53,17 +55,23 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    username = verify_token(token)
-    if username is None:
-        raise credentials_exception
+    with phase("auth"):
+        username = verify_token(token)
+        if username is None:
+            raise credentials_exception
 
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
-        raise credentials_exception
+        user = db.query(User).filter(User.username == username).first()
+        if user is None:
+            raise credentials_exception
 
     return user
 
 async def get_current_active_user(current_user = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
+    return current_user
+
+async def get_profiling_admin(current_user = Depends(get_current_active_user)):
+    if current_user.username not in settings.PROFILING_ADMINS:
+        raise HTTPException(status_code=403, detail="Not allowed to view profiles")
     return current_user
\ No newline at end of file
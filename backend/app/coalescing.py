@@ -0,0 +1,107 @@
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .models import IdempotencyKey
+
+
+PAYLOAD_MISMATCH_DETAIL = "Idempotency-Key was already used with a different request payload"
+
+
+class SingleFlight:
+    """Share one in-flight computation between concurrent callers with the same key.
+
+    The first caller for a key starts the work as its own task; callers arriving
+    while it runs await the same task instead of starting another one. The task is
+    shielded so a disconnecting client does not cancel the work for everyone else.
+
+    When a request_hash is given, a caller may only join a flight started for the
+    same payload; a different payload under the same key is rejected with 422.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._hashes: Dict[Hashable, Optional[str]] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]], request_hash: Optional[str] = None) -> Any:
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self._inflight[key] = future
+            self._hashes[key] = request_hash
+            future.add_done_callback(lambda done: self._forget(key, done))
+        elif request_hash is not None and self._hashes.get(key) != request_hash:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=PAYLOAD_MISMATCH_DETAIL)
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: asyncio.Future):
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+            self._hashes.pop(key, None)
+        # Retrieve the exception so an abandoned failure is not logged as unhandled
+        if not future.cancelled():
+            future.exception()
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+
+def fingerprint(payload: Dict[str, Any]) -> str:
+    """Stable hash of a request payload, used to detect identical requests."""
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def find_idempotent_resource(db: Session, user_id: int, scope: str, key: str, request_hash: str) -> Optional[int]:
+    """Return the resource id stored for an Idempotency-Key still inside the replay window."""
+    record = db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.scope == scope,
+        IdempotencyKey.key == key
+    ).first()
+
+    if not record:
+        return None
+
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.IDEMPOTENCY_WINDOW_HOURS)
+    created_at = record.created_at
+    if created_at is not None and created_at.tzinfo is None:
+        # SQLite returns naive timestamps, stored as UTC; Postgres returns them in the session time zone
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    if created_at is not None and created_at < cutoff:
+        # Expired keys may be reused for a fresh request
+        db.delete(record)
+        db.commit()
+        return None
+
+    if record.request_hash != request_hash:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=PAYLOAD_MISMATCH_DETAIL)
+
+    return record.resource_id
+
+
+def record_idempotent_resource(db: Session, user_id: int, scope: str, key: str, request_hash: str, resource_id: int):
+    """Stage the Idempotency-Key row in the same transaction that creates the resource."""
+    db.add(IdempotencyKey(
+        user_id=user_id,
+        scope=scope,
+        key=key,
+        request_hash=request_hash,
+        resource_id=resource_id
+    ))
+
+
+def forget_idempotent_resource(db: Session, user_id: int, scope: str, key: str):
+    """Drop an Idempotency-Key whose resource no longer exists, so the key starts a fresh request."""
+    db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.scope == scope,
+        IdempotencyKey.key == key
+    ).delete(synchronize_session=False)
+    db.commit()
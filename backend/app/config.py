@@ -8,6 +8,56 @@ class Settings:
     SECRET_KEY: str = os.getenv("SECRET_KEY", "dev-secret-key-change-in-production")
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
 
+    # "openai", or "fake" for the deterministic offline stand-in used by benchmarks
+    LLM_BACKEND: str = os.getenv("LLM_BACKEND", "openai")
+    FAKE_LLM_LATENCY_MS: float = float(os.getenv("FAKE_LLM_LATENCY_MS", 0))
+
+    # Model routing: optional JSON catalog replacing the built-in one, how long latency/error
+    # samples count, and the error rate past which a model is passed over
+    MODEL_CATALOG_PATH: str = os.getenv("MODEL_CATALOG_PATH", "")
+    MODEL_STATS_WINDOW_SECONDS: float = float(os.getenv("MODEL_STATS_WINDOW_SECONDS", 300))
+    MODEL_MAX_ERROR_RATE: float = float(os.getenv("MODEL_MAX_ERROR_RATE", 0.2))
+    # A call still running after this multiple of its section's p95 target is abandoned as failed
+    MODEL_TIMEOUT_FACTOR: float = float(os.getenv("MODEL_TIMEOUT_FACTOR", 2.0))
+    # Per-model fake latency/error profiles as JSON, e.g. {"gpt-4o": {"base_ms": 800, "per_token_ms": 20}}
+    FAKE_LLM_PROFILES: str = os.getenv("FAKE_LLM_PROFILES", "")
+
+    # Client retries carrying the same Idempotency-Key within this window replay the stored result
+    IDEMPOTENCY_WINDOW_HOURS: int = int(os.getenv("IDEMPOTENCY_WINDOW_HOURS", 24))
+
+    # Near-duplicate blog detection: share of a topic's words already covered by an
+    # existing title, and content similarity (Jaccard) at which a new post is flagged
+    DUPLICATE_TOPIC_THRESHOLD: float = float(os.getenv("DUPLICATE_TOPIC_THRESHOLD", 0.8))
+    DUPLICATE_CONTENT_THRESHOLD: float = float(os.getenv("DUPLICATE_CONTENT_THRESHOLD", 0.7))
+
+    # Public URLs used in sitemaps and feeds: pages live on the frontend, feed files on the API
+    SITE_URL: str = os.getenv("SITE_URL", "https://eqori-frontend.onrender.com").rstrip("/")
+    PUBLIC_API_URL: str = os.getenv("PUBLIC_API_URL", "https://eqori-ai-suite.onrender.com").rstrip("/")
+    FEED_TITLE: str = os.getenv("FEED_TITLE", "Eqori AI Marketing Blog")
+    FEED_DESCRIPTION: str = os.getenv("FEED_DESCRIPTION", "AI marketing, SEO and e-commerce content tips from Eqori")
+
+    # Generation archiving (off unless ARCHIVE_AFTER_DAYS is set): non-favorited generations older than
+    # ARCHIVE_AFTER_DAYS move to one compressed SQLite file per month under ARCHIVE_DIR, checked every
+    # ARCHIVE_INTERVAL_HOURS. ARCHIVE_DIR holds the only copy of those rows, so it must be persistent storage
+    ARCHIVE_DIR: str = os.getenv("ARCHIVE_DIR", "./archive")
+    ARCHIVE_AFTER_DAYS: int = int(os.getenv("ARCHIVE_AFTER_DAYS", 0))
+    ARCHIVE_INTERVAL_HOURS: float = float(os.getenv("ARCHIVE_INTERVAL_HOURS", 24))
+
+    # Blog view analytics: how often in-memory view buckets are written to the rollup table
+    VIEW_FLUSH_SECONDS: int = int(os.getenv("VIEW_FLUSH_SECONDS", 60))
+
+    # Read replicas: comma-separated URLs for query-only routes, the lag past which a replica
+    # is skipped, how long a user's reads stay on the primary after a write, and the heartbeat period
+    DATABASE_REPLICA_URLS: list = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+    REPLICA_MAX_LAG_SECONDS: float = float(os.getenv("REPLICA_MAX_LAG_SECONDS", 5))
+    READ_YOUR_WRITES_SECONDS: float = float(os.getenv("READ_YOUR_WRITES_SECONDS", 10))
+    REPLICA_HEARTBEAT_SECONDS: float = float(os.getenv("REPLICA_HEARTBEAT_SECONDS", 1))
+
+    # Request profiling: slow-request threshold, admins allowed to profile, sampling interval
+    SLOW_REQUEST_MS: float = float(os.getenv("SLOW_REQUEST_MS", 1000))
+    PROFILING_ADMINS: set = {name.strip() for name in os.getenv("PROFILING_ADMINS", "").split(",") if name.strip()}
+    PROFILE_SAMPLE_INTERVAL_MS: float = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", 5))
+
     # Render.com specific
     PORT: int = int(os.getenv("PORT", 8000))
 
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, func, inspect, select, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -18,6 +18,82 @@ engine = create_engine(
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+def add_missing_columns(bind=engine):
+    """Add nullable model columns that are missing from existing tables.
+
+    create_all() only creates missing tables, so optional columns added to a model
+    would otherwise never reach a database created by an earlier release.
+    """
+    inspector = inspect(bind)
+    preparer = bind.dialect.identifier_preparer
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                conn.execute(text(
+                    f"ALTER TABLE {preparer.quote(table.name)} "
+                    f"ADD COLUMN {preparer.quote(column.name)} {column.type.compile(dialect=bind.dialect)}"
+                ))
+
+def add_missing_indexes(bind=engine):
+    """Create model indexes that are missing from existing tables, for the same reason."""
+    inspector = inspect(bind)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind)
+
+def use_autoincrement_ids(bind=engine, reserved_ids=None):
+    """Rebuild SQLite tables created before their model asked for AUTOINCREMENT.
+
+    Without it SQLite hands out max(id) + 1, so deleting the newest row frees its id
+    for the next insert. reserved_ids maps a table name to a column holding ids that
+    must never be handed out again (ids of rows moved elsewhere); the id sequence is
+    seeded past them.
+    """
+    if bind.dialect.name != "sqlite":
+        return
+    reserved_ids = reserved_ids or {}
+    with bind.begin() as conn:
+        inspector = inspect(conn)
+        for table in Base.metadata.sorted_tables:
+            if not table.dialect_options["sqlite"]["autoincrement"] or not inspector.has_table(table.name):
+                continue
+            sql = conn.execute(
+                text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": table.name}
+            ).scalar()
+            if "AUTOINCREMENT" not in sql.upper():
+                existing = {column["name"] for column in inspector.get_columns(table.name)}
+                columns = ", ".join(f'"{column.name}"' for column in table.columns if column.name in existing)
+                legacy = f"_{table.name}_legacy"
+                conn.execute(text(f'ALTER TABLE "{table.name}" RENAME TO "{legacy}"'))
+                for index in inspector.get_indexes(legacy):
+                    conn.execute(text(f'DROP INDEX "{index["name"]}"'))
+                table.create(conn)
+                conn.execute(text(f'INSERT INTO "{table.name}" ({columns}) SELECT {columns} FROM "{legacy}"'))
+                conn.execute(text(f'DROP TABLE "{legacy}"'))
+
+            reserved = reserved_ids.get(table.name)
+            if reserved is None or not inspector.has_table(reserved.table.name):
+                continue
+            floor = conn.execute(select(func.max(reserved))).scalar() or 0
+            current = conn.execute(
+                text("SELECT seq FROM sqlite_sequence WHERE name = :name"), {"name": table.name}
+            ).scalar()
+            if current is None:
+                conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)"),
+                             {"name": table.name, "seq": floor})
+            elif current < floor:
+                conn.execute(text("UPDATE sqlite_sequence SET seq = :seq WHERE name = :name"),
+                             {"name": table.name, "seq": floor})
+
 def get_db():
     db = SessionLocal()
     try:
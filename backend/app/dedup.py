@@ -0,0 +1,199 @@
+import threading
+import zlib
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .related import tokenize
+
+_PRIME = np.uint64(4294967311)  # smallest prime above 2**32
+
+MIN_TOPIC_JACCARD = 0.35
+
+
+def _permutations(count: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.RandomState(seed)
+    # a < 2**31 keeps a * hash (< 2**32) inside uint64
+    a = rng.randint(1, 2 ** 31 - 1, size=count).astype(np.uint64)
+    b = rng.randint(0, 2 ** 31 - 1, size=count).astype(np.uint64)
+    return a, b
+
+
+def word_shingles(text: Optional[str], size: int) -> Set[str]:
+    tokens = tokenize(text)
+    if size == 1 or len(tokens) < size:
+        return set(tokens)
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+class MinHashLSH:
+    """MinHash signatures bucketed by band, for sub-millisecond near-duplicate lookup.
+
+    `bands * rows` hash functions make up a signature. Two sets become candidates
+    when any band matches exactly, which happens with high probability once their
+    Jaccard similarity passes roughly (1 / bands) ** (1 / rows). Candidates are then
+    verified against their stored signatures.
+    """
+
+    def __init__(self, bands: int, rows: int, seed: int = 1):
+        self.bands = bands
+        self.rows = rows
+        self._a, self._b = _permutations(bands * rows, seed)
+        self._buckets: List[Dict[bytes, Set[int]]] = [{} for _ in range(bands)]
+        # Signatures live in one matrix so candidates are verified with a single gather
+        self._matrix = np.zeros((1024, bands * rows), dtype=np.uint32)
+        self._sizes = np.zeros(1024, dtype=np.float64)
+        self._slot_items: List[int] = []
+        self._item_slots: Dict[int, int] = {}
+        self._free: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._item_slots)
+
+    def signature(self, shingles: Set[str]) -> Optional[np.ndarray]:
+        if not shingles:
+            return None
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+        return ((np.outer(hashes, self._a) + self._b) % _PRIME).min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def add(self, item_id: int, shingles: Set[str]):
+        self.remove(item_id)
+        signature = self.signature(shingles)
+        if signature is None:
+            return
+
+        if self._free:
+            slot = self._free.pop()
+            self._slot_items[slot] = item_id
+        else:
+            slot = len(self._slot_items)
+            self._slot_items.append(item_id)
+            if slot == len(self._matrix):
+                self._matrix = np.concatenate([self._matrix, np.zeros_like(self._matrix)])
+                self._sizes = np.concatenate([self._sizes, np.zeros_like(self._sizes)])
+
+        self._matrix[slot] = signature
+        self._sizes[slot] = len(shingles)
+        self._item_slots[item_id] = slot
+        for band, key in zip(self._buckets, self._band_keys(signature)):
+            band.setdefault(key, set()).add(slot)
+
+    def remove(self, item_id: int):
+        slot = self._item_slots.pop(item_id, None)
+        if slot is None:
+            return
+        for band, key in zip(self._buckets, self._band_keys(self._matrix[slot])):
+            members = band.get(key)
+            if members is not None:
+                members.discard(slot)
+                if not members:
+                    del band[key]
+        self._slot_items[slot] = -1
+        self._free.append(slot)
+
+    def query(
+        self,
+        shingles: Set[str],
+        exclude: Optional[int] = None,
+        min_jaccard: float = 0.0,
+        min_containment: float = 0.0
+    ) -> List[Tuple[int, float, float]]:
+        """(item id, estimated Jaccard, estimated containment of the query), most similar first."""
+        signature = self.signature(shingles)
+        if signature is None:
+            return []
+
+        candidates: Set[int] = set().union(*(
+            band.get(key, ()) for band, key in zip(self._buckets, self._band_keys(signature))
+        ))
+        if exclude in self._item_slots:
+            candidates.discard(self._item_slots[exclude])
+        if not candidates:
+            return []
+
+        slots = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        jaccard = (self._matrix[slots] == signature).mean(axis=1)
+
+        # |A ∩ B| = J * (|A| + |B|) / (1 + J); containment divides that by |A|
+        query_size = len(shingles)
+        containment = np.minimum(1.0, jaccard * (query_size + self._sizes[slots]) / ((1.0 + jaccard) * query_size))
+
+        keep = (jaccard >= min_jaccard) & (containment >= min_containment)
+        slots, jaccard, containment = slots[keep], jaccard[keep], containment[keep]
+
+        order = np.argsort(-jaccard, kind="stable")
+        return [(self._slot_items[slots[i]], float(jaccard[i]), float(containment[i])) for i in order]
+
+
+class DuplicateDetector:
+    """Near-duplicate checks for blog posts.
+
+    Titles are indexed as word sets so a requested topic can be checked before any
+    LLM call; contents are indexed as word 3-gram shingles to flag generated posts
+    that ended up close to an existing article anyway.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.loaded = False
+        self._reset()
+
+    def _reset(self):
+        self._titles = MinHashLSH(bands=40, rows=3, seed=11)
+        self._contents = MinHashLSH(bands=16, rows=4, seed=13)
+
+    def load(self, session_factory):
+        from .models import BlogPost
+
+        db = session_factory()
+        try:
+            rows = db.query(BlogPost.id, BlogPost.title, BlogPost.content).yield_per(1000)
+            with self._lock:
+                self._reset()
+                for row in rows:
+                    self._add(row)
+                self.loaded = True
+        finally:
+            db.close()
+
+    def ensure_loaded(self, session_factory):
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self.load(session_factory)
+
+    def _add(self, post):
+        self._titles.add(post.id, word_shingles(post.title, 1))
+        self._contents.add(post.id, word_shingles(post.content, 3))
+
+    def upsert(self, post):
+        with self._lock:
+            self._add(post)
+
+    def remove(self, post_id: int):
+        with self._lock:
+            self._titles.remove(post_id)
+            self._contents.remove(post_id)
+
+    def find_topic_duplicate(self, topic: str, threshold: float) -> Optional[Tuple[int, float]]:
+        """Existing post whose title covers at least `threshold` of the topic's words.
+
+        A minimum Jaccard similarity keeps one-word topics such as "SEO" from
+        matching every title that merely contains the word.
+        """
+        matches = self._titles.query(word_shingles(topic, 1), min_jaccard=MIN_TOPIC_JACCARD, min_containment=threshold)
+        best = max(matches, key=lambda match: match[2], default=None)
+        return (best[0], best[2]) if best else None
+
+    def find_content_duplicate(self, post, threshold: float) -> Optional[Tuple[int, float]]:
+        """Most similar other post by content, when its Jaccard similarity reaches `threshold`."""
+        matches = self._contents.query(word_shingles(post.content, 3), exclude=post.id, min_jaccard=threshold)
+        if matches:
+            return matches[0][0], matches[0][1]
+        return None
+
+
+duplicate_detector = DuplicateDetector()
@@ -0,0 +1,306 @@
+import hashlib
+import heapq
+import threading
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Dict, List, NamedTuple, Optional, Set
+from xml.sax.saxutils import escape
+
+from .config import settings
+
+# Sitemaps protocol limit; posts are sharded by id so an edit only dirties one shard
+SITEMAP_URLS_PER_FILE = 50000
+FEED_ITEMS = 50
+
+STATIC_PAGES = ("/", "/blog")
+# Shard 0 also carries the static pages, so every shard leaves room for them
+POSTS_PER_SHARD = SITEMAP_URLS_PER_FILE - len(STATIC_PAGES)
+
+SITEMAP_MEDIA_TYPE = "application/xml"
+RSS_MEDIA_TYPE = "application/rss+xml"
+ATOM_MEDIA_TYPE = "application/atom+xml"
+
+
+class FeedDocument(NamedTuple):
+    body: bytes
+    etag: str
+    media_type: str
+
+
+class FeedEntry(NamedTuple):
+    post_id: int
+    slug: str
+    title: str
+    summary: str
+    category: Optional[str]
+    published: datetime
+    updated: datetime
+    sitemap_url: bytes
+
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None:
+        return None
+    # Naive timestamps are stored as UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def _iso(value: datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%S+00:00")
+
+
+def _document(body, media_type: str) -> FeedDocument:
+    encoded = body.encode("utf-8") if isinstance(body, str) else body
+    return FeedDocument(encoded, f'"{hashlib.blake2b(encoded, digest_size=16).hexdigest()}"', media_type)
+
+
+def post_url(slug: str) -> str:
+    return f"{settings.SITE_URL}/blog/{slug}"
+
+
+def sitemap_shard(post_id: int) -> int:
+    # Post ids start at 1
+    return (post_id - 1) // POSTS_PER_SHARD
+
+
+def sitemap_shard_name(shard: int) -> str:
+    return f"sitemaps/blog-{shard}.xml"
+
+
+class FeedStore:
+    """Ready-to-serve sitemap, RSS and Atom documents for published blog posts.
+
+    Posts are held as small entries with their sitemap <url> element pre-rendered.
+    A change marks only the affected documents dirty; they are re-rendered on their
+    next request and then served as cached bytes with a content-hash ETag.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.loaded = False
+        self._entries: Dict[int, FeedEntry] = {}
+        self._shards: Dict[int, Dict[int, bytes]] = {}
+        self._documents: Dict[str, FeedDocument] = {}
+        self._dirty: Set[str] = set()
+        # Kept up to date on insert and recomputed only when a member is removed
+        self._latest_entries: Optional[List[FeedEntry]] = []
+        self._shard_lastmod: Dict[int, datetime] = {}
+
+    def load(self, session_factory):
+        from .models import BlogPost
+
+        db = session_factory()
+        try:
+            rows = db.query(
+                BlogPost.id, BlogPost.slug, BlogPost.title, BlogPost.excerpt, BlogPost.meta_description,
+                BlogPost.category, BlogPost.created_at, BlogPost.updated_at, BlogPost.published_at
+            ).filter(BlogPost.is_published == True).yield_per(1000)
+            with self._lock:
+                self._entries.clear()
+                self._shards.clear()
+                self._documents.clear()
+                self._latest_entries = []
+                self._shard_lastmod.clear()
+                for row in rows:
+                    self._put(row)
+                self._dirty.clear()
+                self.loaded = True
+        finally:
+            db.close()
+
+    def ensure_loaded(self, session_factory):
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self.load(session_factory)
+
+    def upsert(self, post):
+        with self._lock:
+            self._drop(post.id)
+            if getattr(post, "is_published", True):
+                self._put(post)
+
+    def remove(self, post_id: int):
+        with self._lock:
+            self._drop(post_id)
+
+    def _put(self, post):
+        published = _utc(post.published_at or post.created_at) or datetime.now(timezone.utc)
+        updated = _utc(post.updated_at) or published
+        url = post_url(post.slug)
+        entry = FeedEntry(
+            post_id=post.id,
+            slug=post.slug,
+            title=post.title,
+            summary=post.excerpt or post.meta_description or "",
+            category=post.category,
+            published=published,
+            updated=updated,
+            sitemap_url=f"<url><loc>{escape(url)}</loc><lastmod>{_iso(updated)}</lastmod></url>".encode("utf-8"),
+        )
+        self._entries[post.id] = entry
+        shard = sitemap_shard(post.id)
+        self._shards.setdefault(shard, {})[post.id] = entry.sitemap_url
+        if shard in self._shard_lastmod or len(self._shards[shard]) == 1:
+            self._shard_lastmod[shard] = max(updated, self._shard_lastmod.get(shard, updated))
+
+        if self._latest_entries is not None:
+            self._latest_entries.append(entry)
+            if len(self._latest_entries) > FEED_ITEMS * 2:
+                self._latest_entries = self._newest(self._latest_entries)
+        self._mark_dirty(shard)
+
+    def _drop(self, post_id: int):
+        entry = self._entries.pop(post_id, None)
+        if entry is None:
+            return
+        if self._latest_entries is not None and entry in self._latest_entries:
+            self._latest_entries = None
+        shard = sitemap_shard(post_id)
+        self._shard_lastmod.pop(shard, None)
+        shard_urls = self._shards.get(shard)
+        if shard_urls is not None:
+            shard_urls.pop(post_id, None)
+            if not shard_urls:
+                del self._shards[shard]
+                self._documents.pop(sitemap_shard_name(shard), None)
+        self._mark_dirty(shard)
+
+    def _mark_dirty(self, shard: int):
+        self._dirty.update(("sitemap.xml", sitemap_shard_name(shard), "feed/rss.xml", "feed/atom.xml"))
+
+    def peek(self, name: str) -> Optional[FeedDocument]:
+        """The cached document if it is up to date; None when it has to be rendered first."""
+        document = self._documents.get(name)
+        if document is not None and name not in self._dirty:
+            return document
+        return None
+
+    def get(self, name: str) -> Optional[FeedDocument]:
+        """Serve a cached document, re-rendering it first if a post change made it stale.
+
+        Rendering a large sitemap takes tens of milliseconds; call this from a worker
+        thread, not the event loop.
+        """
+        document = self.peek(name)
+        if document is not None:
+            return document
+
+        with self._lock:
+            if name in self._dirty or name not in self._documents:
+                document = self._render(name)
+                if document is None:
+                    return None
+                self._documents[name] = document
+                self._dirty.discard(name)
+            return self._documents[name]
+
+    def _render(self, name: str) -> Optional[FeedDocument]:
+        if name == "sitemap.xml":
+            return self._render_sitemap()
+        if name == "feed/rss.xml":
+            return self._render_rss()
+        if name == "feed/atom.xml":
+            return self._render_atom()
+        if name.startswith("sitemaps/blog-") and name.endswith(".xml"):
+            shard = name[len("sitemaps/blog-"):-len(".xml")]
+            if shard.isdigit() and int(shard) in self._shards and self._uses_index():
+                return self._render_urlset(int(shard))
+        return None
+
+    def _uses_index(self) -> bool:
+        return any(shard > 0 for shard in self._shards)
+
+    def _static_urls(self) -> List[bytes]:
+        return [f"<url><loc>{escape(settings.SITE_URL + path)}</loc></url>".encode("utf-8") for path in STATIC_PAGES]
+
+    def _render_urlset(self, shard: int) -> FeedDocument:
+        # Static pages ride along with the first shard
+        urls = self._static_urls() if shard == 0 else []
+        urls.extend(self._shards.get(shard, {}).values())
+        return _document(
+            b'<?xml version="1.0" encoding="UTF-8"?>\n'
+            b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            + b"".join(urls)
+            + b"</urlset>\n",
+            SITEMAP_MEDIA_TYPE,
+        )
+
+    def _render_sitemap(self) -> FeedDocument:
+        # Small corpora get a single urlset; larger ones a sitemap index over id shards
+        if not self._uses_index():
+            return self._render_urlset(0)
+
+        sitemaps = []
+        for shard in sorted(self._shards):
+            lastmod = self._shard_lastmod.get(shard)
+            if lastmod is None:
+                lastmod = self._shard_lastmod[shard] = max(self._entries[post_id].updated for post_id in self._shards[shard])
+            location = f"{settings.PUBLIC_API_URL}/{sitemap_shard_name(shard)}"
+            sitemaps.append(f"<sitemap><loc>{escape(location)}</loc><lastmod>{_iso(lastmod)}</lastmod></sitemap>")
+        return _document(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            + "".join(sitemaps)
+            + "</sitemapindex>\n",
+            SITEMAP_MEDIA_TYPE,
+        )
+
+    @staticmethod
+    def _newest(entries) -> List[FeedEntry]:
+        return heapq.nlargest(FEED_ITEMS, entries, key=lambda entry: (entry.published, entry.post_id))
+
+    def _latest(self) -> List[FeedEntry]:
+        if self._latest_entries is None:
+            self._latest_entries = self._newest(self._entries.values())
+        return self._newest(self._latest_entries)
+
+    def _render_rss(self) -> FeedDocument:
+        items = []
+        for entry in self._latest():
+            url = escape(post_url(entry.slug))
+            category = f"<category>{escape(entry.category)}</category>" if entry.category else ""
+            items.append(
+                f"<item><title>{escape(entry.title)}</title><link>{url}</link>"
+                f'<guid isPermaLink="true">{url}</guid>'
+                f"<pubDate>{format_datetime(entry.published)}</pubDate>"
+                f"<description>{escape(entry.summary)}</description>{category}</item>"
+            )
+        return _document(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom"><channel>'
+            f"<title>{escape(settings.FEED_TITLE)}</title>"
+            f"<link>{escape(settings.SITE_URL)}/blog</link>"
+            f"<description>{escape(settings.FEED_DESCRIPTION)}</description>"
+            f'<atom:link href="{escape(settings.PUBLIC_API_URL)}/feed/rss.xml" rel="self" type="{RSS_MEDIA_TYPE}"/>'
+            + "".join(items)
+            + "</channel></rss>\n",
+            RSS_MEDIA_TYPE,
+        )
+
+    def _render_atom(self) -> FeedDocument:
+        latest = self._latest()
+        updated = max((entry.updated for entry in latest), default=datetime(1970, 1, 1, tzinfo=timezone.utc))
+        entries = []
+        for entry in latest:
+            url = escape(post_url(entry.slug))
+            category = f'<category term="{escape(entry.category)}"/>' if entry.category else ""
+            entries.append(
+                f'<entry><title>{escape(entry.title)}</title><link href="{url}"/><id>{url}</id>'
+                f"<published>{_iso(entry.published)}</published><updated>{_iso(entry.updated)}</updated>"
+                f"<summary>{escape(entry.summary)}</summary>{category}</entry>"
+            )
+        return _document(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<feed xmlns="http://www.w3.org/2005/Atom">'
+            f"<title>{escape(settings.FEED_TITLE)}</title>"
+            f'<link href="{escape(settings.SITE_URL)}/blog"/>'
+            f'<link href="{escape(settings.PUBLIC_API_URL)}/feed/atom.xml" rel="self"/>'
+            f"<id>{escape(settings.SITE_URL)}/blog</id><updated>{_iso(updated)}</updated>"
+            + "".join(entries)
+            + "</feed>\n",
+            ATOM_MEDIA_TYPE,
+        )
+
+
+feed_store = FeedStore()
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+from openai import OpenAI
+
+from .config import settings
+from .profiling import phase
+
+FAKE_VOCABULARY = """
+boost sales with clear benefits your customers love fast shipping premium quality trusted brand
+discover the difference today save time and money designed for everyday life simple setup
+results you can see join thousands of happy shoppers limited offer order now learn more
+""".split()
+
+
+class FakeLLM:
+    """Deterministic stand-in for the OpenAI API, used by benchmarks and local runs.
+
+    The same model and messages always produce the same text. Prompts asking for
+    JSON get a blog-post shaped JSON object. An optional fixed latency simulates
+    the network round trip.
+
+    Per-model profiles simulate models that differ in speed and reliability:
+    latency is base_ms plus per_token_ms for each generated output token (about
+    four characters each), scaled by log-normal jitter, and error_rate of the
+    calls fail.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, profiles: Optional[Dict[str, dict]] = None):
+        self.latency_ms = latency_ms
+        self.profiles = profiles or {}
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._chance = random.Random(0)
+
+    def complete(self, messages: List[Dict[str, str]], model: str, max_tokens: Optional[int] = None) -> str:
+        with self._lock:
+            self.calls += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+        output = self._generate(messages, model, max_tokens)
+
+        profile = self.profiles.get(model)
+        if profile:
+            with self._lock:
+                jitter = self._chance.lognormvariate(0, profile.get("jitter", 0.2))
+                failed = self._chance.random() < profile.get("error_rate", 0.0)
+            latency_ms = (profile.get("base_ms", 0) + profile.get("per_token_ms", 0) * len(output) / 4) * jitter
+            time.sleep(latency_ms / 1000)
+            if failed:
+                raise RuntimeError(f"Simulated {model} failure")
+        return output
+
+    def _generate(self, messages: List[Dict[str, str]], model: str, max_tokens: Optional[int]) -> str:
+        prompt = messages[-1]["content"]
+        rng = random.Random(hashlib.sha256(f"{model}\n{prompt}".encode("utf-8")).digest())
+        words = min(250, int((max_tokens or 1000) * 0.75))
+
+        def text(count: int) -> str:
+            return " ".join(rng.choice(FAKE_VOCABULARY) for _ in range(count))
+
+        if "Format as JSON" in prompt:
+            topic_match = re.search(r'about "(.+?)"', prompt)
+            topic = topic_match.group(1) if topic_match else text(5)
+            return json.dumps({
+                "title": topic[:60],
+                "meta_description": text(22)[:160],
+                "excerpt": text(28)[:200],
+                # Articles are asked for at 800-1200 words
+                "content": f"## {topic}\n\n{text(min(1000, int((max_tokens or 1000) * 0.5)))}",
+                "keywords": ", ".join(topic.lower().split()[:5]),
+                "tags": ", ".join(rng.sample(FAKE_VOCABULARY, 3)),
+            })
+
+        return text(words)
+
+
+class TruncatedCompletion(RuntimeError):
+    """The model stopped at max_tokens, so the text is cut off mid-answer."""
+
+
+fake_llm = FakeLLM(
+    latency_ms=settings.FAKE_LLM_LATENCY_MS,
+    profiles=json.loads(settings.FAKE_LLM_PROFILES) if settings.FAKE_LLM_PROFILES else None
+)
+
+
+def chat_completion(
+    messages: List[Dict[str, str]],
+    model: str = "gpt-3.5-turbo",
+    max_tokens: Optional[int] = None,
+    temperature: float = 0.7,
+    timeout: Optional[float] = None
+) -> str:
+    """Run a chat completion against the configured backend and return the message text.
+
+    Raises TruncatedCompletion when the answer hit max_tokens. `timeout` (seconds)
+    bounds the OpenAI request; the fake backend ignores it.
+    """
+    with phase("llm"):
+        if settings.LLM_BACKEND == "fake":
+            return fake_llm.complete(messages, model, max_tokens)
+
+        client = OpenAI(api_key=settings.OPENAI_API_KEY, **({"timeout": timeout} if timeout is not None else {}))
+        options = {"model": model, "messages": messages, "temperature": temperature}
+        if max_tokens is not None:
+            options["max_tokens"] = max_tokens
+        response = client.chat.completions.create(**options)
+        choice = response.choices[0]
+        if choice.finish_reason == "length":
+            raise TruncatedCompletion(f"{model} stopped at max_tokens={max_tokens}")
+        return choice.message.content
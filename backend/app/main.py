@@ -1,16 +1,34 @@
+import asyncio
+import logging
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import create_engine
 import os
 from dotenv import load_dotenv
 
-from .database import engine, Base
-from .routes import auth, generation, blog
+from .database import engine, Base, SessionLocal, add_missing_columns, add_missing_indexes, use_autoincrement_ids
+from .related import related_index
+from .dedup import duplicate_detector
+from .feeds import feed_store
+from .analytics import view_recorder
+from .archive import generation_archive
+from .models import ArchivedGeneration
+from .config import settings
+from .profiling import RequestProfilingMiddleware, check_profiler_internals, instrument_engine
+from .replicas import ReadYourWritesMiddleware, replica_router
+from .routes import auth, generation, blog, feeds, debug
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Create database tables
 Base.metadata.create_all(bind=engine)
+add_missing_columns(engine)
+add_missing_indexes(engine)
+use_autoincrement_ids(engine, reserved_ids={"generations": ArchivedGeneration.__table__.c.id})
+instrument_engine(engine)
 
 app = FastAPI(title="Eqori AI Marketing Suite", version="1.0.0")
 
@@ -36,10 +54,96 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Outermost, so the timings cover CORS and routing as well
+app.add_middleware(RequestProfilingMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(generation.router)
 app.include_router(blog.router)
+app.include_router(feeds.router)
+app.include_router(debug.router)
+
+@app.on_event("startup")
+async def check_profiler():
+    # The profiler leans on asyncio and anyio internals; say so now if they have changed
+    check_profiler_internals()
+
+@app.on_event("startup")
+async def warm_indexes():
+    # Build in the background so startup is not held up by a large corpus
+    loop = asyncio.get_running_loop()
+    loop.run_in_executor(None, related_index.ensure_loaded, SessionLocal)
+    loop.run_in_executor(None, duplicate_detector.ensure_loaded, SessionLocal)
+    loop.run_in_executor(None, feed_store.ensure_loaded, SessionLocal)
+
+@app.on_event("startup")
+async def start_view_analytics():
+    app.state.view_analytics_task = asyncio.create_task(_run_view_analytics())
+
+@app.on_event("startup")
+async def start_replica_heartbeat():
+    if replica_router.enabled:
+        app.state.replica_heartbeat_task = asyncio.create_task(_run_replica_heartbeat())
+
+@app.on_event("startup")
+async def start_generation_archiving():
+    if settings.ARCHIVE_AFTER_DAYS > 0:
+        app.state.archiving_task = asyncio.create_task(_run_generation_archiving())
+
+@app.on_event("shutdown")
+async def stop_view_analytics():
+    app.state.view_analytics_task.cancel()
+    await run_in_threadpool(view_recorder.flush, SessionLocal)
+
+@app.on_event("shutdown")
+async def stop_replica_heartbeat():
+    task = getattr(app.state, "replica_heartbeat_task", None)
+    if task is not None:
+        task.cancel()
+
+@app.on_event("shutdown")
+async def stop_generation_archiving():
+    task = getattr(app.state, "archiving_task", None)
+    if task is not None:
+        task.cancel()
+
+async def _run_view_analytics():
+    """Flush view buckets periodically and fold old hourly buckets into days once an hour"""
+    last_compaction = None
+    while True:
+        await asyncio.sleep(settings.VIEW_FLUSH_SECONDS)
+        try:
+            await run_in_threadpool(view_recorder.flush, SessionLocal)
+            current_hour = view_recorder.trending_computed_at.replace(minute=0, second=0, microsecond=0)
+            if current_hour != last_compaction:
+                await run_in_threadpool(view_recorder.compact, SessionLocal)
+                last_compaction = current_hour
+        except Exception:
+            logger.exception("View analytics flush failed")
+
+async def _run_replica_heartbeat():
+    """Write the primary heartbeat and re-check replica lag on a fixed period"""
+    while True:
+        try:
+            await run_in_threadpool(replica_router.heartbeat, SessionLocal)
+        except Exception:
+            logger.exception("Replica heartbeat failed")
+        await asyncio.sleep(settings.REPLICA_HEARTBEAT_SECONDS)
+
+async def _run_generation_archiving():
+    """Move old generations to the monthly archives and compact partitions touched by rehydration"""
+    while True:
+        try:
+            moved = await run_in_threadpool(generation_archive.archive_old, SessionLocal)
+            if moved:
+                logger.info("Archived %d generations", moved)
+            await run_in_threadpool(generation_archive.compact)
+        except Exception:
+            logger.exception("Generation archiving failed")
+        await asyncio.sleep(settings.ARCHIVE_INTERVAL_HOURS * 3600)
 
 @app.get("/")
 async def root():
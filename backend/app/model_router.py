@@ -0,0 +1,260 @@
+import contextvars
+import json
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .config import settings
+from .llm import chat_completion
+
+logger = logging.getLogger(__name__)
+
+# Below this many recent calls a model's latency and error stats are not trusted yet
+MIN_SAMPLES = 20
+# Fall back once observed p95 reaches this share of the section's target, before it is missed
+P95_RISK_RATIO = 0.9
+MAX_SAMPLES = 500
+# After a demotion, one call in this many probes the model, and this many probes
+# are enough to decide whether it can take full traffic again
+PROBE_EVERY = 50
+PROBE_SAMPLES = 5
+
+
+@dataclass
+class ModelSpec:
+    name: str
+    # USD per 1k tokens
+    input_cost: float
+    output_cost: float
+
+    def estimated_cost(self, prompt_tokens: int, max_tokens: int) -> float:
+        return prompt_tokens / 1000 * self.input_cost + max_tokens / 1000 * self.output_cost
+
+
+@dataclass
+class SectionPolicy:
+    section: str
+    # Most preferred first; later entries should be faster or cheaper fallbacks
+    models: List[str]
+    max_tokens: int
+    temperature: float
+    p95_target_ms: float
+    max_cost: float
+
+
+DEFAULT_CATALOG = {
+    "models": [
+        {"name": "gpt-4o", "input_cost": 0.0025, "output_cost": 0.01},
+        {"name": "gpt-4o-mini", "input_cost": 0.00015, "output_cost": 0.0006},
+        {"name": "gpt-3.5-turbo", "input_cost": 0.0005, "output_cost": 0.0015},
+    ],
+    "sections": [
+        {"section": "description", "models": ["gpt-4o-mini", "gpt-3.5-turbo"],
+         "max_tokens": 400, "temperature": 0.7, "p95_target_ms": 8000, "max_cost": 0.005},
+        {"section": "ads", "models": ["gpt-4o-mini", "gpt-3.5-turbo"],
+         "max_tokens": 500, "temperature": 0.8, "p95_target_ms": 8000, "max_cost": 0.005},
+        {"section": "email", "models": ["gpt-4o-mini", "gpt-3.5-turbo"],
+         "max_tokens": 600, "temperature": 0.7, "p95_target_ms": 10000, "max_cost": 0.005},
+        # An 800-1200 word article plus the other JSON fields runs to about 2,500 tokens
+        {"section": "blog", "models": ["gpt-4o", "gpt-4o-mini", "gpt-3.5-turbo"],
+         "max_tokens": 4000, "temperature": 0.7, "p95_target_ms": 45000, "max_cost": 0.05},
+    ],
+}
+
+
+def estimate_tokens(messages: List[Dict[str, str]]) -> int:
+    # Roughly four characters per token for English prose
+    return sum(len(message["content"]) for message in messages) // 4 + 4 * len(messages)
+
+
+@dataclass
+class ModelStats:
+    """Recent (timestamp, latency ms, succeeded) samples for one section on one model.
+
+    Not thread-safe on its own; the router holds its lock around every use.
+    """
+
+    samples: Deque[Tuple[float, float, bool]] = field(default_factory=lambda: deque(maxlen=MAX_SAMPLES))
+    demoted: bool = False
+    skipped: int = 0
+
+    def record(self, latency_ms: float, ok: bool):
+        self.samples.append((time.monotonic(), latency_ms, ok))
+
+    def recent(self, window_seconds: float) -> List[Tuple[float, float, bool]]:
+        cutoff = time.monotonic() - window_seconds
+        return [sample for sample in self.samples if sample[0] >= cutoff]
+
+    def summary(self, window_seconds: float) -> dict:
+        recent = self.recent(window_seconds)
+        latencies = sorted(latency for _, latency, ok in recent if ok)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None
+        errors = sum(1 for _, _, ok in recent if not ok)
+        return {
+            "calls": len(recent),
+            "p95_ms": round(p95, 1) if p95 is not None else None,
+            "error_rate": round(errors / len(recent), 3) if recent else None,
+        }
+
+
+class ModelRouter:
+    """Chooses the model for each generation section from a catalog and live stats.
+
+    Each section lists candidate models in order of preference. A candidate is
+    skipped when its estimated cost exceeds the section's ceiling, when its recent
+    error rate is above MODEL_MAX_ERROR_RATE, or when its recent p95 puts the
+    section's p95 target at risk; the next (faster) candidate is tried instead.
+    Failed calls fall through to the remaining candidates before the error is raised;
+    a response cut off at max_tokens, one the caller's parser rejects, or a call
+    still running after MODEL_TIMEOUT_FACTOR times the section's p95 target counts
+    as a failed call.
+
+    Stats are kept per (section, model), since a 2,000-token article and a tweet take
+    very different times on the same model, and only cover the last
+    MODEL_STATS_WINDOW_SECONDS, so a demoted model gets traffic again once its bad
+    samples age out.
+    """
+
+    def __init__(self, catalog: Optional[dict] = None):
+        self._lock = threading.Lock()
+        self.configure(catalog or DEFAULT_CATALOG)
+
+    def configure(self, catalog: dict):
+        models = {spec["name"]: ModelSpec(**spec) for spec in catalog["models"]}
+        sections = {policy["section"]: SectionPolicy(**policy) for policy in catalog["sections"]}
+        for policy in sections.values():
+            unknown = [name for name in policy.models if name not in models]
+            if unknown:
+                raise ValueError(f"Section {policy.section!r} uses models missing from the catalog: {unknown}")
+        with self._lock:
+            self.models = models
+            self.sections = sections
+            self.stats: Dict[Tuple[str, str], ModelStats] = {
+                (section, name): ModelStats() for section, policy in sections.items() for name in policy.models
+            }
+
+    def candidates(self, section: str, messages: List[Dict[str, str]]) -> List[str]:
+        """Models to try for this call, best first."""
+        policy = self.sections[section]
+        prompt_tokens = estimate_tokens(messages)
+        window = settings.MODEL_STATS_WINDOW_SECONDS
+
+        affordable = [
+            name for name in policy.models
+            if self.models[name].estimated_cost(prompt_tokens, policy.max_tokens) <= policy.max_cost
+        ]
+        if not affordable:
+            # Nothing fits the ceiling: use the cheapest candidate rather than fail the request
+            affordable = [min(policy.models, key=lambda name: self.models[name].estimated_cost(prompt_tokens, policy.max_tokens))]
+
+        healthy, at_risk = [], []
+        with self._lock:
+            for name in affordable:
+                stats = self.stats[(section, name)]
+                summary = stats.summary(window)
+                if summary["calls"] >= (PROBE_SAMPLES if stats.demoted else MIN_SAMPLES):
+                    stats.demoted = (
+                        summary["error_rate"] > settings.MODEL_MAX_ERROR_RATE
+                        or (summary["p95_ms"] is not None and summary["p95_ms"] >= policy.p95_target_ms * P95_RISK_RATIO)
+                    )
+                    demoted = stats.demoted
+                elif stats.demoted:
+                    # Bad samples aged out; send a trickle of probes rather than full traffic
+                    stats.skipped += 1
+                    demoted = stats.skipped % PROBE_EVERY != 0
+                else:
+                    demoted = False
+
+                if demoted:
+                    at_risk.append((summary, name))
+                else:
+                    healthy.append(name)
+
+        # Struggling models stay as a last resort, least bad first
+        at_risk.sort(key=lambda item: (item[0]["error_rate"] or 0, item[0]["p95_ms"] or 0))
+        return healthy + [name for _, name in at_risk]
+
+    def complete(
+        self, section: str, messages: List[Dict[str, str]], parse: Optional[Callable[[str], Any]] = None
+    ) -> Tuple[Any, str]:
+        """Run the section's completion on the best available model; returns (text, model).
+
+        With `parse`, the result is parse(text), and a response it raises on is
+        treated like a failed call so the next candidate gets a chance.
+        """
+        policy = self.sections[section]
+        timeout = policy.p95_target_ms * settings.MODEL_TIMEOUT_FACTOR / 1000
+        last_error = None
+        for name in self.candidates(section, messages):
+            started = time.perf_counter()
+            try:
+                text = _call_with_timeout(
+                    lambda: chat_completion(
+                        messages, model=name, max_tokens=policy.max_tokens, temperature=policy.temperature, timeout=timeout
+                    ),
+                    timeout,
+                )
+                result = parse(text) if parse is not None else text
+            except TimeoutError as exc:
+                self._record(section, name, (time.perf_counter() - started) * 1000, ok=False)
+                logger.warning("Model %s timed out after %.1fs for %s, trying the next candidate", name, timeout, section)
+                last_error = exc
+                continue
+            except Exception as exc:
+                self._record(section, name, (time.perf_counter() - started) * 1000, ok=False)
+                logger.warning("Model %s failed for %s, trying the next candidate: %s", name, section, exc)
+                last_error = exc
+                continue
+            self._record(section, name, (time.perf_counter() - started) * 1000, ok=True)
+            return result, name
+        raise last_error
+
+    def _record(self, section: str, name: str, latency_ms: float, ok: bool):
+        with self._lock:
+            self.stats[(section, name)].record(latency_ms, ok)
+
+    def status(self) -> dict:
+        window = settings.MODEL_STATS_WINDOW_SECONDS
+        with self._lock:
+            return {
+                section: {
+                    "p95_target_ms": policy.p95_target_ms,
+                    "max_cost": policy.max_cost,
+                    "models": {name: self.stats[(section, name)].summary(window) for name in policy.models},
+                }
+                for section, policy in self.sections.items()
+            }
+
+
+def _call_with_timeout(call: Callable[[], Any], timeout: float) -> Any:
+    """call() on its own thread, raising TimeoutError if it has not returned within `timeout` seconds.
+
+    A call that times out is abandoned, not interrupted; the thread ends when the
+    backend's own timeout fires. It runs in a copy of the caller's context, so its
+    time is still charged to the request's llm phase.
+    """
+    future: Future = Future()
+    context = contextvars.copy_context()
+
+    def run():
+        try:
+            future.set_result(context.run(call))
+        except BaseException as exc:
+            future.set_exception(exc)
+
+    threading.Thread(target=run, name="model-call", daemon=True).start()
+    return future.result(timeout=timeout)
+
+
+def _load_catalog() -> Optional[dict]:
+    if not settings.MODEL_CATALOG_PATH:
+        return None
+    with open(settings.MODEL_CATALOG_PATH) as catalog_file:
+        return json.load(catalog_file)
+
+
+model_router = ModelRouter(_load_catalog())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Float, Index, JSON, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -18,6 +18,12 @@ class User(Base):
 
 class Generation(Base):
     __tablename__ = "generations"
+    __table_args__ = (
+        Index("ix_generations_user_created", "user_id", "created_at"),
+        Index("ix_generations_created_at", "created_at"),
+        # Ids are never reused, so a new generation cannot take the id of an archived one
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -30,9 +36,18 @@ class Generation(Base):
     product_description = Column(Text)
     social_media_ads = Column(Text)
     email_content = Column(Text)
+    # Model that produced each section, as chosen by the model router
+    description_model = Column(String)
+    ads_model = Column(String)
+    email_model = Column(String)
+    # Local SEO analysis of product_description; see app.seo
+    seo_score = Column(Float)
+    seo_report = Column(JSON)
     is_favorited = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Set when an archived generation is brought back, so it is not archived again straight away
+    rehydrated_at = Column(DateTime(timezone=True))
 
     user = relationship("User", back_populates="generations")
 
@@ -55,5 +70,53 @@ class BlogPost(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     published_at = Column(DateTime(timezone=True))
+    duplicate_of_id = Column(Integer, index=True)
+    content_model = Column(String)
+    seo_score = Column(Float)
+    seo_report = Column(JSON)
 
-    user = relationship("User", back_populates="blog_posts")
\ No newline at end of file
+    user = relationship("User", back_populates="blog_posts")
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (UniqueConstraint("user_id", "scope", "key", name="uq_idempotency_user_scope_key"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    scope = Column(String, nullable=False)
+    key = Column(String, nullable=False)
+    request_hash = Column(String, nullable=False)
+    resource_id = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class PostViewRollup(Base):
+    __tablename__ = "post_view_rollups"
+    __table_args__ = (UniqueConstraint("post_id", "granularity", "bucket_start", name="uq_post_view_rollup_bucket"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    post_id = Column(Integer, index=True, nullable=False)
+    granularity = Column(String, nullable=False)
+    # Naive UTC start of the hour or day the views fall in
+    bucket_start = Column(DateTime, index=True, nullable=False)
+    views = Column(Integer, nullable=False, default=0)
+
+class ReplicationHeartbeat(Base):
+    __tablename__ = "replication_heartbeat"
+
+    # A single row the primary rewrites periodically; how far a replica's copy trails it is that replica's lag
+    id = Column(Integer, primary_key=True)
+    beat_at = Column(DateTime, nullable=False)
+
+class ArchivedGeneration(Base):
+    __tablename__ = "archived_generations"
+    __table_args__ = (Index("ix_archived_generations_user_created", "user_id", "created_at"),)
+
+    # Locator for a generation moved to archive storage; id is the original generation id
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    partition = Column(String, nullable=False)
+    # Copied from the generation so history can list it without opening the archive
+    product_name = Column(String)
+    category = Column(String)
+    created_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
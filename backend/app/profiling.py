@@ -0,0 +1,435 @@
+import asyncio
+import functools
+import inspect
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, List, Optional
+from weakref import WeakKeyDictionary
+from urllib.parse import parse_qs
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_STORED_PROFILES = 20
+MAX_SLOW_REQUESTS = 200
+
+
+class RequestTimings:
+    """Exclusive per-phase wall time for one request.
+
+    Phases nest: entering "db" while inside "auth" pauses the auth clock, so each
+    phase only counts its own time and the phases add up to at most the total.
+    Time the request spent ready to run while the event loop was busy with other
+    requests is reported as "loop_wait" instead of the phase that happened to be open.
+    Threadpool workers running the request's sync code update the same timings, so
+    every update holds a lock.
+    """
+
+    __slots__ = ("started", "totals", "_stack", "_mark", "_lock")
+
+    def __init__(self):
+        self.started = self._mark = time.perf_counter()
+        self.totals: Dict[str, float] = {}
+        self._stack: List[str] = []
+        self._lock = threading.Lock()
+
+    def enter(self, name: str):
+        with self._lock:
+            now = time.perf_counter()
+            if self._stack:
+                top = self._stack[-1]
+                self.totals[top] = self.totals.get(top, 0.0) + now - self._mark
+            self._stack.append(name)
+            self._mark = now
+
+    def exit(self, name: str):
+        with self._lock:
+            if not self._stack or self._stack[-1] != name:
+                return
+            now = time.perf_counter()
+            self.totals[name] = self.totals.get(name, 0.0) + now - self._mark
+            self._stack.pop()
+            self._mark = now
+
+    def waited(self, seconds: float):
+        """Move up to `seconds` of the open phase's latest time into "loop_wait"."""
+        with self._lock:
+            now = time.perf_counter()
+            seconds = min(seconds, now - self._mark)
+            if seconds <= 0:
+                return
+            self.totals["loop_wait"] = self.totals.get("loop_wait", 0.0) + seconds
+            self._mark += seconds
+
+    def summary(self) -> Dict[str, float]:
+        with self._lock:
+            total = time.perf_counter() - self.started
+            totals = dict(self.totals)
+        phases = {name: round(seconds * 1000, 2) for name, seconds in totals.items()}
+        phases["other"] = round(max(0.0, total - sum(totals.values())) * 1000, 2)
+        phases["total"] = round(total * 1000, 2)
+        return phases
+
+
+_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+class LoopMonitor:
+    """Remembers when an event loop last went idle.
+
+    The loop only blocks in select() with a timeout when nothing is ready to run, so
+    a request that resumes later than the end of that select() was ready and
+    waiting for the loop since at least then. asyncio has no public hook for that
+    moment, so this wraps the private selector of selector-based loops;
+    check_profiler_internals() turns loop_wait off, loudly, on any other loop.
+    """
+
+    def __init__(self, selector):
+        self.last_idle = time.perf_counter()
+        select = selector.select
+
+        def timed_select(timeout=None):
+            events = select(timeout)
+            if timeout is None or timeout > 0:
+                self.last_idle = time.perf_counter()
+            return events
+
+        selector.select = timed_select
+
+
+_loop_monitors: "WeakKeyDictionary[asyncio.AbstractEventLoop, Optional[LoopMonitor]]" = WeakKeyDictionary()
+
+
+def _loop_monitor() -> Optional[LoopMonitor]:
+    loop = asyncio.get_running_loop()
+    if loop not in _loop_monitors:
+        selector = getattr(loop, "_selector", None)
+        if selector is None or not callable(getattr(selector, "select", None)):
+            logger.error(
+                "Event loop %s has no selector to watch; request timings will not report loop_wait",
+                type(loop).__name__
+            )
+            _loop_monitors[loop] = None
+        else:
+            _loop_monitors[loop] = LoopMonitor(selector)
+    return _loop_monitors[loop]
+
+
+class _LoopWaitTracker:
+    """Awaits a coroutine, charging each resume's wait for a busy event loop to "loop_wait"."""
+
+    def __init__(self, awaitable, timings: RequestTimings, monitor: LoopMonitor):
+        self._awaitable = awaitable
+        self._timings = timings
+        self._monitor = monitor
+
+    def __await__(self):
+        iterator = self._awaitable.__await__()
+        resume, value = iterator.send, None
+        while True:
+            try:
+                yielded = resume(value)
+            except StopIteration as stop:
+                return stop.value
+            suspended = time.perf_counter()
+            try:
+                value = yield yielded
+                resume = iterator.send
+            except GeneratorExit:
+                iterator.close()
+                raise
+            except BaseException as exc:
+                value, resume = exc, iterator.throw
+            self._timings.waited(time.perf_counter() - max(suspended, self._monitor.last_idle))
+
+
+@contextmanager
+def phase(name: str):
+    """Attribute the enclosed block to `name` in the current request's timings."""
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    timings.enter(name)
+    try:
+        yield
+    finally:
+        timings.exit(name)
+
+
+def instrument_engine(engine):
+    """Count time spent executing SQL as the "db" phase."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        timings = _timings.get()
+        if timings is not None:
+            timings.enter("db")
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        timings = _timings.get()
+        if timings is not None:
+            timings.exit("db")
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        timings = _timings.get()
+        if timings is not None:
+            timings.exit("db")
+
+
+def _timed_endpoint(endpoint):
+    """Time the endpoint body as "handler" and what follows it as "serialize"."""
+    if not inspect.iscoroutinefunction(endpoint):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        timings = _timings.get()
+        if timings is None:
+            return await endpoint(*args, **kwargs)
+        timings.enter("handler")
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            timings.exit("handler")
+            timings.enter("serialize")
+
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """APIRoute that splits request time into handler and response serialization."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            try:
+                return await handler(request)
+            finally:
+                timings = _timings.get()
+                if timings is not None:
+                    timings.exit("serialize")
+
+        return timed_handler
+
+
+_profiler: ContextVar[Optional["SamplingProfiler"]] = ContextVar("request_profiler", default=None)
+
+
+def _worker_run_code():
+    """Code of anyio's threadpool worker loop, whose `context` local is the job's context.
+
+    anyio has no public way to tell which context a worker thread is running, so this
+    relies on its private worker; None when that no longer looks as expected.
+    """
+    try:
+        from anyio._backends._asyncio import WorkerThread
+        code = WorkerThread.run.__code__
+    except (ImportError, AttributeError):
+        return None
+    return code if "context" in code.co_varnames else None
+
+
+_WORKER_RUN_CODE = _worker_run_code()
+
+
+def check_profiler_internals():
+    """Log loudly, once at startup, which profiling features the installed asyncio and anyio leave off.
+
+    Must run on the serving event loop.
+    """
+    if _WORKER_RUN_CODE is None:
+        logger.error(
+            "anyio's threadpool worker is not the one the profiler knows; "
+            "request profiles will not include threadpool work"
+        )
+    _loop_monitor()
+
+
+class SamplingProfiler:
+    """Samples one request's stacks at a fixed interval into collapsed-stack counts.
+
+    The output is the folded format read by flamegraph.pl and speedscope: one line
+    per distinct stack, frames separated by ";", followed by the sample count.
+    Only threads running the profiled request are sampled: the event loop while the
+    request's own coroutine is on its stack, and threadpool workers whose job was
+    submitted from the request's context. Other concurrent requests are left out.
+    """
+
+    def __init__(self, interval_ms: float, owner_frame):
+        self.interval = interval_ms / 1000
+        self.samples: Counter = Counter()
+        self._owner_frame = owner_frame
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> str:
+        self._stop.set()
+        self._thread.join()
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me or not self._owns(frame):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.samples[";".join(reversed(stack))] += 1
+
+
+    def _owns(self, frame) -> bool:
+        while frame is not None:
+            if frame is self._owner_frame:
+                return True
+            if frame.f_code is _WORKER_RUN_CODE:
+                context = frame.f_locals.get("context")
+                return context is not None and context.get(_profiler) is self
+            frame = frame.f_back
+        return False
+
+
+class ProfileStore:
+    """Recent flame graphs and slow-request records, kept in memory for admins."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._profiles: "OrderedDict[str, dict]" = OrderedDict()
+        self.slow_requests: deque = deque(maxlen=MAX_SLOW_REQUESTS)
+
+    def add_profile(self, profile_id: str, method: str, path: str, folded: str, timings: Dict[str, float]):
+        with self._lock:
+            self._profiles[profile_id] = {
+                "id": profile_id,
+                "method": method,
+                "path": path,
+                "captured_at": datetime.utcnow().isoformat(),
+                "timings_ms": timings,
+                "folded": folded,
+            }
+            while len(self._profiles) > MAX_STORED_PROFILES:
+                self._profiles.popitem(last=False)
+
+    def get_profile(self, profile_id: str) -> Optional[dict]:
+        return self._profiles.get(profile_id)
+
+    def list_profiles(self) -> List[dict]:
+        return [{key: value for key, value in profile.items() if key != "folded"} for profile in reversed(self._profiles.values())]
+
+
+profile_store = ProfileStore()
+
+
+def _profiling_requested(scope) -> bool:
+    query = scope.get("query_string", b"")
+    if b"profile=" in query and parse_qs(query.decode("latin-1")).get("profile", [""])[0] in ("1", "true"):
+        return True
+    for name, value in scope.get("headers", ()):
+        if name == b"x-profile" and value in (b"1", b"true"):
+            return True
+    return False
+
+
+def _is_profiling_admin(scope) -> bool:
+    from .auth import verify_token
+
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer":
+                return False
+            return verify_token(token) in settings.PROFILING_ADMINS
+    return False
+
+
+class RequestProfilingMiddleware:
+    """Per-phase timings for every request, with slow-request capture and opt-in profiling.
+
+    Requests slower than SLOW_REQUEST_MS are logged with their phase breakdown and
+    kept for GET /debug/slow-requests. An admin can add `X-Profile: 1` (or
+    `?profile=1`) to sample that request's stacks; the response then carries an
+    X-Profile-Id header pointing at GET /debug/profiles/{id}.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _timings.set(timings)
+        profiler = profiler_token = None
+        if _profiling_requested(scope) and _is_profiling_admin(scope):
+            # This coroutine's frame is on the event loop's stack exactly while the request runs there
+            profiler = SamplingProfiler(settings.PROFILE_SAMPLE_INTERVAL_MS, sys._getframe())
+            profiler_token = _profiler.set(profiler)
+            profiler.start()
+
+        status_code = 500
+        profile_id = uuid.uuid4().hex if profiler else None
+
+        async def send_with_profile(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if profile_id:
+                    message = dict(message)
+                    message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        monitor = _loop_monitor()
+        try:
+            if monitor is None:
+                await self.app(scope, receive, send_with_profile)
+            else:
+                await _LoopWaitTracker(self.app(scope, receive, send_with_profile), timings, monitor)
+        finally:
+            _timings.reset(token)
+            if profiler_token is not None:
+                _profiler.reset(profiler_token)
+            summary = timings.summary()
+
+            if profiler is not None:
+                folded = profiler.stop()
+                profile_store.add_profile(profile_id, scope["method"], scope["path"], folded, summary)
+
+            if summary["total"] >= settings.SLOW_REQUEST_MS:
+                record = {
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status_code,
+                    "at": datetime.utcnow().isoformat(),
+                    "timings_ms": summary,
+                }
+                profile_store.slow_requests.append(record)
+                logger.warning("Slow request %s %s %s: %s", scope["method"], scope["path"], status_code, summary)
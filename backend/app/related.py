@@ -0,0 +1,256 @@
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have having
+he her here hers him his how i if in into is it its itself just me more most my no nor not now of off on
+once only or other our ours out over own same she should so some such than that the their theirs them then
+there these they this those through to too under until up very was we were what when where which while who
+whom why will with would you your yours
+""".split())
+
+# Titles, keywords and tags describe a post more precisely than its body text
+FIELD_WEIGHTS = (("title", 3.0), ("keywords", 2.0), ("tags", 2.0), ("content", 1.0))
+
+# Bound the work per post: long articles add little signal after the first couple of thousand tokens
+MAX_CONTENT_TOKENS = 2000
+MAX_QUERY_TERMS = 24
+
+# Terms found in a large share of a big corpus barely separate posts but dominate query cost
+COMMON_TERM_RATIO = 0.1
+COMMON_TERM_MIN_DF = 1000
+
+
+def tokenize(text: Optional[str], limit: Optional[int] = None) -> List[str]:
+    if not text:
+        return []
+    tokens = [t for t in TOKEN_RE.findall(text.lower()) if len(t) > 2 and t not in STOPWORDS]
+    return tokens[:limit] if limit else tokens
+
+
+def post_term_weights(post) -> Dict[str, float]:
+    """Field-weighted, sublinear term frequencies for a BlogPost-like object."""
+    counts: Counter = Counter()
+    for field, weight in FIELD_WEIGHTS:
+        limit = MAX_CONTENT_TOKENS if field == "content" else None
+        for token in tokenize(getattr(post, field, None), limit):
+            counts[token] += weight
+    return {term: 1.0 + math.log(count) for term, count in counts.items()}
+
+
+class RelatedPostsIndex:
+    """In-memory TF-IDF index over published blog posts.
+
+    Each post occupies a slot; postings map a term to the slots containing it, so a
+    query only touches the slots sharing at least one of its strongest terms.
+    Updates are applied incrementally (remove + add); removed slots are masked out
+    and reclaimed by a full compaction once they make up a quarter of the index.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.loaded = False
+        self._reset()
+
+    def _reset(self):
+        self._vocab: Dict[str, int] = {}
+        self._df: List[int] = []
+        self._postings: Dict[int, Tuple[List[int], List[float]]] = {}
+        self._posting_arrays: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._slot_terms: List[Optional[Tuple[np.ndarray, np.ndarray]]] = []
+        self._slot_post: List[int] = []
+        self._norms: List[float] = []
+        self._post_slot: Dict[int, int] = {}
+        self._slug_post: Dict[str, int] = {}
+        self._post_slug: Dict[int, str] = {}
+        self._dead = 0
+        self._arrays: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._cache: Dict[Tuple[int, int], List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._post_slot)
+
+    def _idf(self, term_ids: np.ndarray) -> np.ndarray:
+        df = np.fromiter((self._df[t] for t in term_ids), dtype=np.float64, count=len(term_ids))
+        return np.log((len(self._post_slot) + 1) / (df + 1)) + 1.0
+
+    def load(self, session_factory):
+        """Build the index from every published post in the database."""
+        from .models import BlogPost
+
+        db = session_factory()
+        try:
+            rows = db.query(
+                BlogPost.id, BlogPost.slug, BlogPost.title, BlogPost.content, BlogPost.keywords, BlogPost.tags
+            ).filter(BlogPost.is_published == True).yield_per(1000)
+            with self._lock:
+                self._reset()
+                for row in rows:
+                    self._add(row.id, row.slug, post_term_weights(row))
+                self._refresh_norms()
+                self.loaded = True
+        finally:
+            db.close()
+
+    def ensure_loaded(self, session_factory):
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self.load(session_factory)
+
+    def upsert(self, post):
+        """Add or replace a post; unpublished posts are removed instead."""
+        with self._lock:
+            self._remove(post.id)
+            if getattr(post, "is_published", True):
+                self._add(post.id, post.slug, post_term_weights(post))
+            self._cache.clear()
+
+    def remove(self, post_id: int):
+        with self._lock:
+            self._remove(post_id)
+            self._cache.clear()
+
+    def post_id_for_slug(self, slug: str) -> Optional[int]:
+        return self._slug_post.get(slug)
+
+    def _add(self, post_id: int, slug: str, weights: Dict[str, float]):
+        term_ids = np.empty(len(weights), dtype=np.int64)
+        tfs = np.empty(len(weights), dtype=np.float64)
+
+        slot = len(self._slot_post)
+        for i, (term, tf) in enumerate(weights.items()):
+            term_id = self._vocab.get(term)
+            if term_id is None:
+                term_id = self._vocab[term] = len(self._df)
+                self._df.append(0)
+            self._df[term_id] += 1
+            slots, posting_tfs = self._postings.setdefault(term_id, ([], []))
+            slots.append(slot)
+            posting_tfs.append(tf)
+            self._posting_arrays.pop(term_id, None)
+            term_ids[i] = term_id
+            tfs[i] = tf
+
+        # Norms use the idf at insert time; compaction refreshes them for the whole corpus
+        self._post_slot[post_id] = slot
+        norm = float(np.linalg.norm(tfs * self._idf(term_ids))) if len(term_ids) else 0.0
+        self._slot_terms.append((term_ids, tfs))
+        self._slot_post.append(post_id)
+        self._norms.append(norm or 1.0)
+        self._slug_post[slug] = post_id
+        self._post_slug[post_id] = slug
+        self._arrays = None
+
+    def _remove(self, post_id: int):
+        slot = self._post_slot.pop(post_id, None)
+        if slot is None:
+            return
+        slug = self._post_slug.pop(post_id, None)
+        if slug is not None and self._slug_post.get(slug) == post_id:
+            del self._slug_post[slug]
+        term_ids, _ = self._slot_terms[slot]
+        for term_id in term_ids:
+            self._df[term_id] -= 1
+        self._slot_terms[slot] = None
+        self._dead += 1
+        self._arrays = None
+
+        if self._dead * 4 > len(self._slot_post):
+            self._compact()
+
+    def _compact(self):
+        """Rebuild postings without removed slots and refresh all norms."""
+        live = [(self._slot_post[slot], terms) for slot, terms in enumerate(self._slot_terms) if terms is not None]
+        slugs = dict(self._post_slug)
+        vocab = {term_id: term for term, term_id in self._vocab.items()}
+        self._reset()
+        for post_id, (term_ids, tfs) in live:
+            self._add(post_id, slugs[post_id], {vocab[t]: tf for t, tf in zip(term_ids, tfs)})
+        self._refresh_norms()
+        self.loaded = True
+
+    def _refresh_norms(self):
+        self._norms = [
+            float(np.linalg.norm(tfs * self._idf(term_ids))) or 1.0 for term_ids, tfs in self._slot_terms
+        ]
+        self._arrays = None
+
+    def _live_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._arrays is None:
+            alive = np.fromiter((terms is not None for terms in self._slot_terms), dtype=bool, count=len(self._slot_terms))
+            self._arrays = (np.asarray(self._norms, dtype=np.float64), alive)
+        return self._arrays
+
+    def _posting(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        arrays = self._posting_arrays.get(term_id)
+        if arrays is None:
+            slots, tfs = self._postings[term_id]
+            arrays = self._posting_arrays[term_id] = (np.asarray(slots, dtype=np.int64), np.asarray(tfs, dtype=np.float64))
+        return arrays
+
+    def peek(self, post_id: int, limit: int = 5) -> Optional[List[int]]:
+        """The cached answer for related(); None when it has to be computed first."""
+        return self._cache.get((post_id, limit))
+
+    def related(self, post_id: int, limit: int = 5) -> List[int]:
+        """Ids of the `limit` most similar posts, best first.
+
+        May wait on the lock while an update compacts the index; call this from a
+        worker thread, not the event loop.
+        """
+        cache_key = (post_id, limit)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            slot = self._post_slot.get(post_id)
+            if slot is None or limit <= 0:
+                return []
+
+            term_ids, tfs = self._slot_terms[slot]
+            if not len(term_ids):
+                return []
+            df = np.fromiter((self._df[t] for t in term_ids), dtype=np.float64, count=len(term_ids))
+            idf = np.log((len(self._post_slot) + 1) / (df + 1)) + 1.0
+            query = tfs * idf
+
+            discriminative = df <= max(COMMON_TERM_MIN_DF, COMMON_TERM_RATIO * len(self._post_slot))
+            if discriminative.any():
+                term_ids, query, idf = term_ids[discriminative], query[discriminative], idf[discriminative]
+
+            # Only the strongest terms take part; weak ones barely move the ranking
+            if len(query) > MAX_QUERY_TERMS:
+                strongest = np.argpartition(-query, MAX_QUERY_TERMS)[:MAX_QUERY_TERMS]
+                term_ids, query, idf = term_ids[strongest], query[strongest], idf[strongest]
+
+            norms, alive = self._live_arrays()
+            scores = np.zeros(len(norms), dtype=np.float64)
+            for term_id, q, term_idf in zip(term_ids, query, idf):
+                slots, posting_tfs = self._posting(int(term_id))
+                scores[slots] += posting_tfs * (q * term_idf)
+
+            scores /= norms
+            scores[~alive] = 0.0
+            scores[slot] = 0.0
+
+            candidates = np.flatnonzero(scores)
+            if len(candidates) > limit:
+                candidates = candidates[np.argpartition(-scores[candidates], limit)[:limit]]
+            ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+            result = [self._slot_post[s] for s in ranked]
+            self._cache[cache_key] = result
+            return result
+
+
+related_index = RelatedPostsIndex()
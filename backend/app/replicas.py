@@ -0,0 +1,205 @@
+import itertools
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from fastapi import Depends, Request
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker
+
+from .auth import verify_token
+from .config import settings
+from .database import SessionLocal, get_db
+from .models import ReplicationHeartbeat
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class Replica:
+    def __init__(self, url: str):
+        if url.startswith("postgres://"):
+            url = url.replace("postgres://", "postgresql://", 1)
+        self.url = make_url(url).render_as_string(hide_password=True)
+        self.engine = create_engine(url, connect_args={"check_same_thread": False} if "sqlite" in url else {})
+        self.sessionmaker = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        # Unknown until the first heartbeat check, so reads start on the primary
+        self.healthy = False
+        self.lag_seconds: Optional[float] = None
+        self.checked_at: Optional[datetime] = None
+        self.reads = 0
+
+
+class ReplicaRouter:
+    """Routes query-only sessions to read replicas, falling back to the primary.
+
+    The primary rewrites a heartbeat row every REPLICA_HEARTBEAT_SECONDS and each
+    check compares a replica's copy of that row with the last beat written, so a
+    replica more than REPLICA_MAX_LAG_SECONDS behind (or unreachable) is skipped
+    until it catches up. Healthy replicas are used round-robin.
+
+    Users who just wrote something read from the primary for READ_YOUR_WRITES_SECONDS
+    so they see their own changes. That window is tracked per process.
+    """
+
+    def __init__(self):
+        self.replicas: List[Replica] = []
+        self._lock = threading.Lock()
+        self._cycle = itertools.count()
+        self._sticky: Dict[str, float] = {}
+        self._last_beat: Optional[datetime] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def configure(self, urls: List[str]):
+        for replica in self.replicas:
+            replica.engine.dispose()
+        self.replicas = [Replica(url) for url in urls]
+        self._last_beat = None
+
+    def heartbeat(self, session_factory=SessionLocal):
+        """Check every replica against the previous beat, then write a new one on the primary."""
+        for replica in self.replicas:
+            self._check(replica)
+
+        beat_at = datetime.utcnow()
+        db = session_factory()
+        try:
+            beat = db.get(ReplicationHeartbeat, 1)
+            if beat is None:
+                db.add(ReplicationHeartbeat(id=1, beat_at=beat_at))
+            else:
+                beat.beat_at = beat_at
+            db.commit()
+        finally:
+            db.close()
+        self._last_beat = beat_at
+
+    def _check(self, replica: Replica):
+        was_healthy = replica.healthy
+        try:
+            db = replica.sessionmaker()
+            try:
+                beat = db.get(ReplicationHeartbeat, 1)
+                replica_beat = beat.beat_at if beat else None
+            finally:
+                db.close()
+        except Exception as exc:
+            replica.healthy = False
+            replica.lag_seconds = None
+            if was_healthy:
+                logger.warning("Read replica %s unreachable, reading from primary: %s", replica.url, exc)
+            return
+        finally:
+            replica.checked_at = datetime.utcnow()
+
+        if replica_beat is None or self._last_beat is None:
+            replica.healthy = False
+            replica.lag_seconds = None
+            return
+
+        replica.lag_seconds = max(0.0, (self._last_beat - replica_beat).total_seconds())
+        replica.healthy = replica.lag_seconds <= settings.REPLICA_MAX_LAG_SECONDS
+        if was_healthy and not replica.healthy:
+            logger.warning("Read replica %s is %.1fs behind, reading from primary", replica.url, replica.lag_seconds)
+        elif replica.healthy and not was_healthy:
+            logger.info("Read replica %s back in rotation (lag %.1fs)", replica.url, replica.lag_seconds)
+
+    def mark_write(self, key: str):
+        now = time.monotonic()
+        with self._lock:
+            self._sticky[key] = now + settings.READ_YOUR_WRITES_SECONDS
+            if len(self._sticky) > 10000:
+                self._sticky = {user: until for user, until in self._sticky.items() if until > now}
+
+    def is_sticky(self, key: Optional[str]) -> bool:
+        return key is not None and self._sticky.get(key, 0.0) > time.monotonic()
+
+    def replica_session(self, key: Optional[str] = None) -> Optional[Session]:
+        """Session on the next healthy replica, or None when the read should go to the primary."""
+        if not self.replicas or self.is_sticky(key):
+            return None
+
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+
+        replica = healthy[next(self._cycle) % len(healthy)]
+        replica.reads += 1
+        return replica.sessionmaker()
+
+    def status(self) -> List[dict]:
+        return [
+            {
+                "url": replica.url,
+                "healthy": replica.healthy,
+                "lag_seconds": replica.lag_seconds,
+                "checked_at": replica.checked_at.isoformat() if replica.checked_at else None,
+                "reads": replica.reads,
+            }
+            for replica in self.replicas
+        ]
+
+
+replica_router = ReplicaRouter()
+replica_router.configure(settings.DATABASE_REPLICA_URLS)
+
+
+def _user_key(authorization: Optional[str]) -> Optional[str]:
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer":
+        return None
+    return verify_token(token)
+
+
+def get_read_db(request: Request, primary: Session = Depends(get_db)):
+    """Session for query-only routes: a healthy replica, or the primary right after the caller's own writes.
+
+    Falling back reuses the request's primary session (which does not connect until
+    first used), so routes that also authenticate do not hold two connections.
+    """
+    key = _user_key(request.headers.get("authorization")) if replica_router.enabled else None
+    db = replica_router.replica_session(key)
+    if db is None:
+        yield primary
+        return
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+class ReadYourWritesMiddleware:
+    """Pins a user's reads to the primary after any successful write request they make."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS or not replica_router.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        authorization = None
+        for name, value in scope.get("headers", ()):
+            if name == b"authorization":
+                authorization = value.decode("latin-1")
+                break
+
+        async def send_and_mark(message):
+            # Mark before the response goes out so the client's next read already sees it
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                key = _user_key(authorization)
+                if key is not None:
+                    replica_router.mark_write(key)
+            await send(message)
+
+        await self.app(scope, receive, send_and_mark)
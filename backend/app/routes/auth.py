@@ -4,6 +4,7 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from datetime import timedelta
 
 from ..database import get_db
+from ..profiling import ProfiledRoute, phase
 from ..models import User
 from ..schemas import UserCreate, UserLogin, User as UserSchema, Token
 from ..auth import (
@@ -14,7 +15,7 @@ from ..auth import (
     ACCESS_TOKEN_EXPIRE_MINUTES,
 )
 
-router = APIRouter(prefix="/auth", tags=["Authentication"])
+router = APIRouter(prefix="/auth", tags=["Authentication"], route_class=ProfiledRoute)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 def get_user_by_username(db: Session, username: str):
@@ -24,9 +25,10 @@ def get_user_by_email(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
 
 def authenticate_user(db: Session, username: str, password: str):
-    user = get_user_by_username(db, username)
-    if not user or not verify_password(password, user.hashed_password):
-        return False
+    with phase("auth"):
+        user = get_user_by_username(db, username)
+        if not user or not verify_password(password, user.hashed_password):
+            return False
     return user
 
 async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
@@ -35,12 +37,13 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    username = verify_token(token)
-    if username is None:
-        raise credentials_exception
-    user = get_user_by_username(db, username=username)
-    if user is None:
-        raise credentials_exception
+    with phase("auth"):
+        username = verify_token(token)
+        if username is None:
+            raise credentials_exception
+        user = get_user_by_username(db, username=username)
+        if user is None:
+            raise credentials_exception
     return user
 
 @router.post("/register", response_model=UserSchema)
@@ -61,7 +64,8 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
 
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    with phase("auth"):
+        hashed_password = get_password_hash(user_data.password)
     db_user = User(
         email=user_data.email,
         username=user_data.username,
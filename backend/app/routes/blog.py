@@ -1,17 +1,52 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Header, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
+import json
 import re
-from ..database import get_db
-from ..models import BlogPost, User
-from ..schemas import BlogPostCreate, BlogPostUpdate, BlogPost as BlogPostSchema, BlogPostPublic
+from ..database import get_db, SessionLocal
+from ..coalescing import SingleFlight, fingerprint, find_idempotent_resource, forget_idempotent_resource, record_idempotent_resource
+from ..models import BlogPost, PostViewRollup, User
+from ..schemas import BlogPostCreate, BlogPostUpdate, BlogPost as BlogPostSchema, BlogPostPublic, TrendingPost
 from ..auth import get_current_user, get_current_active_user
-from openai import OpenAI
-import os
+from ..related import related_index
+from ..dedup import duplicate_detector
+from ..feeds import feed_store
+from ..analytics import view_recorder, TRENDING_WINDOWS
+from ..config import settings
+from ..model_router import model_router
+from ..profiling import ProfiledRoute
+from ..replicas import get_read_db
+from ..seo import score_posts
 from sqlalchemy import desc, func
 
-router = APIRouter(prefix="/blog", tags=["blog"])
+router = APIRouter(prefix="/blog", tags=["blog"], route_class=ProfiledRoute)
+
+IDEMPOTENCY_SCOPE = "blog"
+blog_flights = SingleFlight()
+
+def _index_post(post: BlogPost):
+    """Keep the in-memory post indexes in step with a committed post.
+
+    An index update can trigger a full compaction of the related-posts index, so
+    async handlers run this in the threadpool.
+    """
+    related_index.upsert(post)
+    duplicate_detector.upsert(post)
+    feed_store.upsert(post)
+
+def _unindex_post(post_id: int):
+    related_index.remove(post_id)
+    duplicate_detector.remove(post_id)
+    feed_store.remove(post_id)
+
+def _flag_content_duplicate(blog_post: BlogPost):
+    """Mark a freshly generated post that came out close to an existing one"""
+    match = duplicate_detector.find_content_duplicate(blog_post, settings.DUPLICATE_CONTENT_THRESHOLD)
+    if match:
+        blog_post.duplicate_of_id = match[0]
 
 def create_slug(title: str) -> str:
     slug = re.sub(r'[^a-zA-Z0-9\s-]', '', title.lower())
@@ -20,8 +55,6 @@ def create_slug(title: str) -> str:
 
 def generate_blog_content(topic: str, category: str = "AI Marketing") -> dict:
     try:
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
         # Generate blog content with SEO focus
         prompt = f"""
         Write a comprehensive blog post about "{topic}" in the {category} category.
@@ -44,59 +77,114 @@ def generate_blog_content(topic: str, category: str = "AI Marketing") -> dict:
         Format as JSON with keys: title, meta_description, excerpt, content, keywords, tags
         """
 
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7
-        )
-
-        import json
-        result = json.loads(response.choices[0].message.content)
+        # A cut-off or malformed JSON answer fails over to the next model instead of the request
+        result, model = model_router.complete("blog", [{"role": "user", "content": prompt}], parse=json.loads)
+        result["model"] = model
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate blog content: {str(e)}")
 
+def _create_blog_post(topic: str, category: str, user_id: int, idempotency_key: Optional[str], request_hash: str) -> int:
+    """Generate and persist a blog post; returns the new post id"""
+    content_data = generate_blog_content(topic, category)
+
+    # Session owned by the shared computation, not by any single request
+    db = SessionLocal()
+    try:
+        slug = create_slug(content_data["title"])
+
+        # Check if slug exists and make it unique
+        existing = db.query(BlogPost).filter(BlogPost.slug == slug).first()
+        if existing:
+            slug = f"{slug}-{datetime.now().strftime('%Y%m%d')}"
+
+        blog_post = BlogPost(
+            title=content_data["title"],
+            slug=slug,
+            content=content_data["content"],
+            excerpt=content_data["excerpt"],
+            meta_description=content_data["meta_description"],
+            keywords=content_data["keywords"],
+            category=category,
+            tags=content_data["tags"],
+            content_model=content_data.get("model"),
+            user_id=user_id,
+            published_at=datetime.now()
+        )
+        _flag_content_duplicate(blog_post)
+        score_posts([blog_post])
+
+        db.add(blog_post)
+        db.flush()
+
+        if idempotency_key:
+            record_idempotent_resource(db, user_id, IDEMPOTENCY_SCOPE, idempotency_key, request_hash, blog_post.id)
+
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another worker stored this Idempotency-Key first; replay its post instead
+            db.rollback()
+            replayed_id = find_idempotent_resource(db, user_id, IDEMPOTENCY_SCOPE, idempotency_key, request_hash) if idempotency_key else None
+            if replayed_id is None:
+                raise
+            return replayed_id
+
+        _index_post(blog_post)
+        return blog_post.id
+    finally:
+        db.close()
+
 @router.post("/generate", response_model=BlogPostSchema)
 async def generate_blog_post(
     topic: str,
     category: str = "AI Marketing",
+    allow_duplicate: bool = False,
+    idempotency_key: Optional[str] = Header(None),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    content_data = generate_blog_content(topic, category)
+    request_hash = fingerprint({"topic": topic, "category": category})
+
+    # A retry replays its stored post before the duplicate check, which would otherwise match that very post
+    if idempotency_key:
+        replayed_id = find_idempotent_resource(db, current_user.id, IDEMPOTENCY_SCOPE, idempotency_key, request_hash)
+        if replayed_id is not None:
+            blog_post = db.get(BlogPost, replayed_id)
+            if blog_post:
+                return blog_post
+            # The post was deleted since; the key no longer protects anything
+            forget_idempotent_resource(db, current_user.id, IDEMPOTENCY_SCOPE, idempotency_key)
+        flight_key = (current_user.id, "key", idempotency_key)
+    else:
+        flight_key = (current_user.id, "payload", request_hash)
+
+    if not allow_duplicate:
+        if not duplicate_detector.loaded:
+            await run_in_threadpool(duplicate_detector.ensure_loaded, SessionLocal)
+        match = duplicate_detector.find_topic_duplicate(topic, settings.DUPLICATE_TOPIC_THRESHOLD)
+        existing = db.get(BlogPost, match[0]) if match else None
+        if existing:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"A similar post already exists: {existing.slug}. Pass allow_duplicate=true to generate anyway."
+            )
 
-    slug = create_slug(content_data["title"])
-
-    # Check if slug exists and make it unique
-    existing = db.query(BlogPost).filter(BlogPost.slug == slug).first()
-    if existing:
-        slug = f"{slug}-{datetime.now().strftime('%Y%m%d')}"
-
-    blog_post = BlogPost(
-        title=content_data["title"],
-        slug=slug,
-        content=content_data["content"],
-        excerpt=content_data["excerpt"],
-        meta_description=content_data["meta_description"],
-        keywords=content_data["keywords"],
-        category=category,
-        tags=content_data["tags"],
-        user_id=current_user.id,
-        published_at=datetime.now()
+    # Concurrent requests for the same topic share one LLM call and one post
+    post_id = await blog_flights.do(
+        flight_key,
+        lambda: run_in_threadpool(_create_blog_post, topic, category, current_user.id, idempotency_key, request_hash),
+        request_hash
     )
 
-    db.add(blog_post)
-    db.commit()
-    db.refresh(blog_post)
-
-    return blog_post
+    return db.get(BlogPost, post_id)
 
 @router.get("/", response_model=List[BlogPostPublic])
 async def get_blog_posts(
     skip: int = 0,
     limit: int = 20,
     category: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     query = db.query(BlogPost).filter(BlogPost.is_published == True)
 
@@ -107,15 +195,41 @@ async def get_blog_posts(
     return posts
 
 @router.get("/categories")
-async def get_categories(db: Session = Depends(get_db)):
+async def get_categories(db: Session = Depends(get_read_db)):
     categories = db.query(BlogPost.category).filter(
         BlogPost.is_published == True,
         BlogPost.category.isnot(None)
     ).distinct().all()
     return [cat[0] for cat in categories if cat[0]]
 
+@router.get("/trending", response_model=List[TrendingPost])
+async def get_trending_posts(window: str = "24h", limit: int = 10, db: Session = Depends(get_read_db)):
+    """Most viewed published posts over the last 24h or 7d"""
+    if window not in TRENDING_WINDOWS:
+        raise HTTPException(status_code=400, detail=f"window must be one of: {', '.join(TRENDING_WINDOWS)}")
+    limit = max(1, min(limit, 50))
+
+    if view_recorder.trending_computed_at is None:
+        await run_in_threadpool(view_recorder.refresh_trending, SessionLocal)
+
+    ranked = view_recorder.trending(window)
+    if not ranked:
+        return []
+
+    posts = {
+        post.id: post for post in db.query(BlogPost).filter(
+            BlogPost.id.in_([post_id for post_id, _ in ranked]),
+            BlogPost.is_published == True
+        ).all()
+    }
+    trending = [
+        TrendingPost(**BlogPostPublic.model_validate(posts[post_id]).model_dump(), window_views=views)
+        for post_id, views in ranked if post_id in posts
+    ]
+    return trending[:limit]
+
 @router.get("/{slug}", response_model=BlogPostSchema)
-async def get_blog_post(slug: str, db: Session = Depends(get_db)):
+async def get_blog_post(slug: str, db: Session = Depends(get_read_db)):
     post = db.query(BlogPost).filter(
         BlogPost.slug == slug,
         BlogPost.is_published == True
@@ -124,12 +238,42 @@ async def get_blog_post(slug: str, db: Session = Depends(get_db)):
     if not post:
         raise HTTPException(status_code=404, detail="Blog post not found")
 
-    # Increment view count
-    post.view_count += 1
-    db.commit()
+    # Counted in memory and flushed in batches along with the hourly rollups
+    view_recorder.record(post.id)
 
     return post
 
+@router.get("/{slug}/related", response_model=List[BlogPostPublic])
+async def get_related_posts(slug: str, limit: int = 5, db: Session = Depends(get_read_db)):
+    """Most similar published posts, for internal linking"""
+    limit = max(1, min(limit, 20))
+
+    if not related_index.loaded:
+        await run_in_threadpool(related_index.ensure_loaded, SessionLocal)
+
+    post_id = related_index.post_id_for_slug(slug)
+    if post_id is None:
+        # Posts published by another worker reach this index on first request
+        post = db.query(BlogPost).filter(
+            BlogPost.slug == slug,
+            BlogPost.is_published == True
+        ).first()
+
+        if not post:
+            raise HTTPException(status_code=404, detail="Blog post not found")
+
+        await run_in_threadpool(related_index.upsert, post)
+        post_id = post.id
+
+    related_ids = related_index.peek(post_id, limit)
+    if related_ids is None:
+        related_ids = await run_in_threadpool(related_index.related, post_id, limit)
+    if not related_ids:
+        return []
+
+    posts = {post.id: post for post in db.query(BlogPost).filter(BlogPost.id.in_(related_ids)).all()}
+    return [posts[related_id] for related_id in related_ids if related_id in posts]
+
 @router.get("/admin/posts", response_model=List[BlogPostSchema])
 async def get_admin_posts(
     skip: int = 0,
@@ -162,9 +306,11 @@ async def update_blog_post(
 
     if post_update.title and post_update.title != post.title:
         post.slug = create_slug(post_update.title)
+    score_posts([post])
 
     db.commit()
     db.refresh(post)
+    await run_in_threadpool(_index_post, post)
 
     return post
 
@@ -183,7 +329,12 @@ async def delete_blog_post(
         raise HTTPException(status_code=404, detail="Blog post not found")
 
     db.delete(post)
+    db.query(BlogPost).filter(BlogPost.duplicate_of_id == post_id).update(
+        {BlogPost.duplicate_of_id: None}, synchronize_session=False
+    )
+    db.query(PostViewRollup).filter(PostViewRollup.post_id == post_id).delete(synchronize_session=False)
     db.commit()
+    await run_in_threadpool(_unindex_post, post_id)
 
     return {"message": "Blog post deleted successfully"}
 
@@ -210,8 +361,20 @@ async def auto_generate_daily_posts(
     categories = ["AI Marketing", "E-commerce", "SEO", "Content Marketing", "Automation"]
 
     generated_posts = []
+    skipped_topics = []
+
+    if not duplicate_detector.loaded:
+        await run_in_threadpool(duplicate_detector.ensure_loaded, SessionLocal)
+
+    for i, topic in enumerate(topics):
+        if len(generated_posts) == 3:  # Generate 3 posts per request
+            break
+
+        # Topics already covered are skipped before paying for a generation
+        if duplicate_detector.find_topic_duplicate(topic, settings.DUPLICATE_TOPIC_THRESHOLD):
+            skipped_topics.append(topic)
+            continue
 
-    for i, topic in enumerate(topics[:3]):  # Generate 3 posts per request
         try:
             category = categories[i % len(categories)]
             content_data = generate_blog_content(topic, category)
@@ -230,20 +393,27 @@ async def auto_generate_daily_posts(
                 keywords=content_data["keywords"],
                 category=category,
                 tags=content_data["tags"],
+                content_model=content_data.get("model"),
                 user_id=current_user.id,
                 published_at=datetime.now()
             )
+            _flag_content_duplicate(blog_post)
 
             db.add(blog_post)
-            generated_posts.append(blog_post.title)
+            generated_posts.append(blog_post)
 
         except Exception as e:
             print(f"Error generating post for topic '{topic}': {str(e)}")
             continue
 
+    score_posts(generated_posts)
     db.commit()
 
+    for blog_post in generated_posts:
+        await run_in_threadpool(_index_post, blog_post)
+
     return {
         "message": f"Generated {len(generated_posts)} blog posts",
-        "posts": generated_posts
+        "posts": [blog_post.title for blog_post in generated_posts],
+        "skipped_duplicates": skipped_topics
     }
\ No newline at end of file
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from ..auth import get_profiling_admin
+from ..model_router import model_router
+from ..profiling import profile_store
+from ..replicas import replica_router
+
+router = APIRouter(prefix="/debug", tags=["Debug"], dependencies=[Depends(get_profiling_admin)])
+
+@router.get("/profiles")
+async def list_profiles():
+    """Recently captured request profiles, newest first"""
+    return profile_store.list_profiles()
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: str):
+    """Collapsed stacks for one profiled request, ready for flamegraph.pl or speedscope"""
+    profile = profile_store.get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile["folded"]
+
+@router.get("/slow-requests")
+async def get_slow_requests(limit: int = 50):
+    """Most recent requests over SLOW_REQUEST_MS with their per-phase timings"""
+    return list(profile_store.slow_requests)[-limit:][::-1]
+
+@router.get("/replicas")
+async def get_replicas():
+    """Health, lag and read counts for each configured read replica"""
+    return replica_router.status()
+
+@router.get("/models")
+async def get_model_routing():
+    """Per-section model candidates with recent p95 latency and error rate"""
+    return model_router.status()
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+
+from ..database import SessionLocal
+from ..feeds import feed_store
+from ..profiling import ProfiledRoute
+
+router = APIRouter(tags=["Feeds"], route_class=ProfiledRoute)
+
+async def _serve(name: str, request: Request) -> Response:
+    if not feed_store.loaded:
+        await run_in_threadpool(feed_store.ensure_loaded, SessionLocal)
+
+    # Fresh documents are served straight from memory; stale ones are re-rendered off the event loop
+    document = feed_store.peek(name) or await run_in_threadpool(feed_store.get, name)
+    if document is None:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    headers = {"ETag": document.etag, "Cache-Control": "public, max-age=300"}
+    if request.headers.get("if-none-match") == document.etag:
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=document.body, media_type=document.media_type, headers=headers)
+
+@router.get("/sitemap.xml")
+async def sitemap(request: Request):
+    """Sitemap of published blog posts, or a sitemap index for large corpora"""
+    return await _serve("sitemap.xml", request)
+
+@router.get("/sitemaps/blog-{shard}.xml")
+async def sitemap_shard(shard: int, request: Request):
+    return await _serve(f"sitemaps/blog-{shard}.xml", request)
+
+@router.get("/feed/rss.xml")
+async def rss_feed(request: Request):
+    return await _serve("feed/rss.xml", request)
+
+@router.get("/feed/atom.xml")
+async def atom_feed(request: Request):
+    return await _serve("feed/atom.xml", request)
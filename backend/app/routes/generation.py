@@ -1,23 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Header, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
-import openai
-import os
+from typing import List, Optional, Tuple
 from dotenv import load_dotenv
 
-from ..database import get_db
+from ..database import get_db, SessionLocal
+from ..coalescing import SingleFlight, fingerprint, find_idempotent_resource, forget_idempotent_resource, record_idempotent_resource
 from ..models import Generation, User
-from ..schemas import GenerationCreate, GenerationUpdate, Generation as GenerationSchema
+from ..schemas import GenerationCreate, GenerationUpdate, Generation as GenerationSchema, GenerationSeoReport
 from ..routes.auth import get_current_user
+from ..model_router import model_router
+from ..archive import generation_archive
+from ..seo import needs_scoring, score_generations, summarize_generations
+from ..profiling import ProfiledRoute
+from ..replicas import get_read_db
 
 load_dotenv()
 
-router = APIRouter(prefix="/generation", tags=["Content Generation"])
+router = APIRouter(prefix="/generation", tags=["Content Generation"], route_class=ProfiledRoute)
 
-# Set OpenAI API key
-openai.api_key = os.getenv("OPENAI_API_KEY")
+IDEMPOTENCY_SCOPE = "generation"
+generation_flights = SingleFlight()
 
-def generate_product_description(product_name: str, category: str, features: str, target_audience: str, tone_of_voice: str, seo_keywords: str) -> str:
+def generate_product_description(product_name: str, category: str, features: str, target_audience: str, tone_of_voice: str, seo_keywords: str) -> Tuple[str, str]:
     prompt = f"""Create an SEO-optimized product description (200-300 words) for the following product:
 
 Product Name: {product_name}
@@ -30,21 +36,18 @@ SEO Keywords: {seo_keywords}
 The description should be engaging, informative, and naturally incorporate the SEO keywords. Focus on benefits rather than just features."""
 
     try:
-        client = openai.OpenAI(api_key=openai.api_key)
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
+        content, model = model_router.complete(
+            "description",
+            [
                 {"role": "system", "content": "You are an expert copywriter specializing in e-commerce product descriptions."},
                 {"role": "user", "content": prompt}
-            ],
-            max_tokens=400,
-            temperature=0.7
+            ]
         )
-        return response.choices[0].message.content.strip()
+        return content.strip(), model
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate product description: {str(e)}")
 
-def generate_social_media_ads(product_name: str, category: str, features: str, target_audience: str, tone_of_voice: str) -> str:
+def generate_social_media_ads(product_name: str, category: str, features: str, target_audience: str, tone_of_voice: str) -> Tuple[str, str]:
     prompt = f"""Create 3 different social media ad copy variations for the following product:
 
 Product Name: {product_name}
@@ -69,21 +72,18 @@ Format as:
 [content]"""
 
     try:
-        client = openai.OpenAI(api_key=openai.api_key)
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
+        content, model = model_router.complete(
+            "ads",
+            [
                 {"role": "system", "content": "You are an expert social media marketer specializing in creating compelling ad copy."},
                 {"role": "user", "content": prompt}
-            ],
-            max_tokens=500,
-            temperature=0.8
+            ]
         )
-        return response.choices[0].message.content.strip()
+        return content.strip(), model
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate social media ads: {str(e)}")
 
-def generate_email_content(product_name: str, category: str, features: str, target_audience: str, tone_of_voice: str) -> str:
+def generate_email_content(product_name: str, category: str, features: str, target_audience: str, tone_of_voice: str) -> Tuple[str, str]:
     prompt = f"""Create email marketing content for the following product:
 
 Product Name: {product_name}
@@ -102,30 +102,22 @@ Create a complete email including:
 The email should be engaging and drive conversions."""
 
     try:
-        client = openai.OpenAI(api_key=openai.api_key)
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
+        content, model = model_router.complete(
+            "email",
+            [
                 {"role": "system", "content": "You are an expert email marketer specializing in product promotion emails."},
                 {"role": "user", "content": prompt}
-            ],
-            max_tokens=600,
-            temperature=0.7
+            ]
         )
-        return response.choices[0].message.content.strip()
+        return content.strip(), model
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate email content: {str(e)}")
 
-@router.post("/generate", response_model=GenerationSchema)
-async def generate_content(
-    generation_data: GenerationCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Generate AI-powered marketing content for a product"""
+def _create_generation(user_id: int, generation_data: GenerationCreate, idempotency_key: Optional[str], request_hash: str) -> int:
+    """Run the LLM pipeline and persist the result; returns the new generation id"""
 
     # Generate all content types
-    product_description = generate_product_description(
+    product_description, description_model = generate_product_description(
         generation_data.product_name,
         generation_data.category or "",
         generation_data.features or "",
@@ -134,7 +126,7 @@ async def generate_content(
         generation_data.seo_keywords or ""
     )
 
-    social_media_ads = generate_social_media_ads(
+    social_media_ads, ads_model = generate_social_media_ads(
         generation_data.product_name,
         generation_data.category or "",
         generation_data.features or "",
@@ -142,7 +134,7 @@ async def generate_content(
         generation_data.tone_of_voice or ""
     )
 
-    email_content = generate_email_content(
+    email_content, email_model = generate_email_content(
         generation_data.product_name,
         generation_data.category or "",
         generation_data.features or "",
@@ -150,40 +142,127 @@ async def generate_content(
         generation_data.tone_of_voice or ""
     )
 
-    # Save to database
-    db_generation = Generation(
-        user_id=current_user.id,
-        product_name=generation_data.product_name,
-        category=generation_data.category,
-        features=generation_data.features,
-        target_audience=generation_data.target_audience,
-        tone_of_voice=generation_data.tone_of_voice,
-        seo_keywords=generation_data.seo_keywords,
-        product_description=product_description,
-        social_media_ads=social_media_ads,
-        email_content=email_content
-    )
+    # Save to database with a session owned by the shared computation, not by one request
+    db = SessionLocal()
+    try:
+        db_generation = Generation(
+            user_id=user_id,
+            product_name=generation_data.product_name,
+            category=generation_data.category,
+            features=generation_data.features,
+            target_audience=generation_data.target_audience,
+            tone_of_voice=generation_data.tone_of_voice,
+            seo_keywords=generation_data.seo_keywords,
+            product_description=product_description,
+            social_media_ads=social_media_ads,
+            email_content=email_content,
+            description_model=description_model,
+            ads_model=ads_model,
+            email_model=email_model
+        )
+        score_generations([db_generation])
+        db.add(db_generation)
+        db.flush()
+
+        if idempotency_key:
+            record_idempotent_resource(db, user_id, IDEMPOTENCY_SCOPE, idempotency_key, request_hash, db_generation.id)
+
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another worker stored this Idempotency-Key first; replay its generation instead
+            db.rollback()
+            replayed_id = find_idempotent_resource(db, user_id, IDEMPOTENCY_SCOPE, idempotency_key, request_hash) if idempotency_key else None
+            if replayed_id is None:
+                raise
+            return replayed_id
+
+        return db_generation.id
+    finally:
+        db.close()
 
-    db.add(db_generation)
-    db.commit()
-    db.refresh(db_generation)
+@router.post("/generate", response_model=GenerationSchema)
+async def generate_content(
+    generation_data: GenerationCreate,
+    idempotency_key: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Generate AI-powered marketing content for a product"""
 
-    return db_generation
+    request_hash = fingerprint(generation_data.dict())
+
+    if idempotency_key:
+        replayed_id = find_idempotent_resource(db, current_user.id, IDEMPOTENCY_SCOPE, idempotency_key, request_hash)
+        if replayed_id is not None:
+            generation = db.get(Generation, replayed_id) or generation_archive.rehydrate(db, replayed_id, current_user.id)
+            if generation:
+                return generation
+            # The generation was deleted since; the key no longer protects anything
+            forget_idempotent_resource(db, current_user.id, IDEMPOTENCY_SCOPE, idempotency_key)
+        flight_key = (current_user.id, "key", idempotency_key)
+    else:
+        flight_key = (current_user.id, "payload", request_hash)
+
+    # Identical concurrent requests share one LLM pipeline and all receive its row
+    generation_id = await generation_flights.do(
+        flight_key,
+        lambda: run_in_threadpool(_create_generation, current_user.id, generation_data, idempotency_key, request_hash),
+        request_hash
+    )
+
+    return db.get(Generation, generation_id)
 
 @router.get("/history", response_model=List[GenerationSchema])
 async def get_user_generations(
+    include_archived: bool = True,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get all generations for the current user"""
     generations = db.query(Generation).filter(Generation.user_id == current_user.id).order_by(Generation.created_at.desc()).all()
+
+    if include_archived:
+        # Summaries from the archive stubs; the full generation is rehydrated when it is opened
+        archived = generation_archive.list_archived(db, current_user.id)
+        if archived:
+            generations = sorted(
+                generations + archived,
+                key=lambda generation: (generation.created_at is not None, generation.created_at),
+                reverse=True
+            )
     return generations
 
+@router.get("/seo-report", response_model=GenerationSeoReport)
+async def get_seo_report(
+    include_archived: bool = True,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """SEO scores summarized across the user's generation history"""
+    generations = db.query(Generation).filter(Generation.user_id == current_user.id).all()
+
+    # Generations created before scoring existed, or scored by an older version, are scored in one batch
+    unscored = [generation for generation in generations if needs_scoring(generation)]
+    if unscored:
+        score_generations(unscored)
+        db.commit()
+
+    if include_archived:
+        # The report needs every description, so unlike history it reads the user's archive files
+        archived = generation_archive.load_archived(db, current_user.id)
+        # Archived rows are scored for the report only; they are stored when rehydrated
+        score_generations([generation for generation in archived if needs_scoring(generation)])
+        generations = generations + archived
+
+    return summarize_generations(generations)
+
 @router.get("/{generation_id}", response_model=GenerationSchema)
 async def get_generation(
     generation_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db),
+    primary: Session = Depends(get_db)
 ):
     """Get a specific generation by ID"""
     generation = db.query(Generation).filter(
@@ -191,6 +270,10 @@ async def get_generation(
         Generation.user_id == current_user.id
     ).first()
 
+    if not generation:
+        # Archived generations are moved back into the hot table on first access
+        generation = generation_archive.rehydrate(primary, generation_id, current_user.id)
+
     if not generation:
         raise HTTPException(status_code=404, detail="Generation not found")
 
@@ -209,12 +292,16 @@ async def update_generation(
         Generation.user_id == current_user.id
     ).first()
 
+    if not generation:
+        generation = generation_archive.rehydrate(db, generation_id, current_user.id)
+
     if not generation:
         raise HTTPException(status_code=404, detail="Generation not found")
 
     # Update fields that are provided
     for field, value in generation_update.dict(exclude_unset=True).items():
         setattr(generation, field, value)
+    score_generations([generation])
 
     db.commit()
     db.refresh(generation)
@@ -232,6 +319,9 @@ async def delete_generation(
         Generation.user_id == current_user.id
     ).first()
 
+    if not generation:
+        generation = generation_archive.rehydrate(db, generation_id, current_user.id)
+
     if not generation:
         raise HTTPException(status_code=404, detail="Generation not found")
 
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 
 class UserBase(BaseModel):
@@ -47,13 +47,40 @@ class Generation(GenerationBase):
     product_description: Optional[str] = None
     social_media_ads: Optional[str] = None
     email_content: Optional[str] = None
+    description_model: Optional[str] = None
+    ads_model: Optional[str] = None
+    email_model: Optional[str] = None
+    seo_score: Optional[float] = None
+    seo_report: Optional[Dict[str, Any]] = None
     is_favorited: bool
     created_at: datetime
     updated_at: Optional[datetime] = None
+    archived: bool = False
 
     class Config:
         from_attributes = True
 
+class SeoKeywordGap(BaseModel):
+    keyword: str
+    missing_in: int
+
+class SeoScoredGeneration(BaseModel):
+    id: int
+    product_name: str
+    seo_score: float
+
+class GenerationSeoReport(BaseModel):
+    generations: int
+    scored: int
+    average_score: Optional[float] = None
+    median_score: Optional[float] = None
+    score_bands: Dict[str, int]
+    average_readability: Optional[float] = None
+    average_keyword_coverage: Optional[float] = None
+    keyword_density_out_of_range: int = 0
+    most_missed_keywords: List[SeoKeywordGap]
+    lowest_scoring: List[SeoScoredGeneration]
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -94,6 +121,10 @@ class BlogPost(BlogPostBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
     published_at: Optional[datetime] = None
+    duplicate_of_id: Optional[int] = None
+    content_model: Optional[str] = None
+    seo_score: Optional[float] = None
+    seo_report: Optional[Dict[str, Any]] = None
 
     class Config:
         from_attributes = True
@@ -111,4 +142,7 @@ class BlogPostPublic(BaseModel):
     published_at: Optional[datetime] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class TrendingPost(BlogPostPublic):
+    window_views: int
@@ -0,0 +1,346 @@
+import re
+from collections import Counter
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+# Bump when scoring changes so stored reports are recomputed on the next SEO report
+SEO_VERSION = 2
+
+# Character ranges search engines display without truncating
+TITLE_LENGTH = (30, 60)
+META_DESCRIPTION_LENGTH = (120, 160)
+# Keyword phrase words as a percentage of all words; above the range reads as stuffing
+KEYWORD_DENSITY = (0.5, 2.5)
+# Flesch reading ease of 60+ is plain English that most adults read easily
+READABILITY_TARGET = 60.0
+
+WEIGHTS = {"keyword_coverage": 35.0, "keyword_density": 20.0, "readability": 25.0, "title": 10.0, "meta_description": 10.0}
+
+# Texts scored per numpy pass; larger passes fall out of CPU cache and get slower per text
+CHUNK_SIZE = 256
+# Longer keyword phrases are matched on their first words only
+MAX_PHRASE_WORDS = 6
+KEYWORD_SPLIT_RE = re.compile(r"[,;|\n]+")
+WORD_RE = re.compile(r"[a-z0-9\u0080-\uffff]")
+
+_HASH_BASE = np.uint64(1099511628211)
+_NGRAM_BASE = np.uint64(0x100000001B3)
+_DOC_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+# Byte classes, looked up after ASCII lowercasing
+_WORD, _VOWEL, _SENTENCE_END = 1, 2, 4
+_CHAR_CLASSES = bytes(
+    (_WORD if chr(byte) in "abcdefghijklmnopqrstuvwxyz0123456789" or byte >= 128 else 0)  # >= 128: UTF-8 letters
+    | (_VOWEL if chr(byte) in "aeiouy" else 0)
+    | (_SENTENCE_END if chr(byte) in ".!?\n" else 0)
+    for byte in range(256)
+)
+# _BYTE_MASKS[n] keeps the first n bytes of a little-endian 8-byte read
+_BYTE_MASKS = np.array([(1 << (8 * n)) - 1 for n in range(9)], dtype=np.uint64)
+_BYTE_SUM = np.uint64(0x0101010101010101)
+
+
+def _read8(buffer) -> np.ndarray:
+    """Every byte offset of a buffer as an unaligned little-endian 8-byte integer, without copying."""
+    return np.ndarray(shape=(len(buffer) - 7,), dtype="<u8", buffer=buffer, strides=(1,))
+
+
+class _Words:
+    """Every word of a batch of texts as flat arrays: owning text, hash, syllables, sentence end.
+
+    Only two byte-wide passes (class lookup and word boundaries) touch every
+    character. Hashes, syllables and sentence ends are then worked out per word
+    from 8-byte reads at the word's position.
+    """
+
+    def __init__(self, texts: Sequence[Optional[str]]):
+        encoded = [(text or "").encode("utf-8") for text in texts]
+        lengths = np.fromiter((len(e) + 1 for e in encoded), dtype=np.int64, count=len(encoded))
+        offsets = np.concatenate(([1], np.cumsum(lengths) + 1))
+        # NULs around each text keep words and sentences from running into the next one;
+        # the trailing padding keeps every 8-byte read inside the buffer
+        data = (b"\0" + b"\0".join(encoded) + b"\0" * 9).lower()
+        chars = np.frombuffer(data, dtype=np.uint8)
+        classes = np.frombuffer(data.translate(_CHAR_CLASSES), dtype=np.uint8)
+
+        # Texts start and end on a NUL, so word starts and ends alternate
+        is_word = (classes & _WORD) != 0
+        edges = np.flatnonzero(is_word[1:] != is_word[:-1]) + 1
+        starts, ends = edges[0::2], edges[1::2]
+        word_lengths = ends - starts
+
+        # Hash and syllables (vowel groups), 8 bytes of each word at a time
+        text_bytes, vowel_bytes = _read8(data), _read8(((classes & _VOWEL) != 0).view(np.uint8))
+        hashes = np.zeros(len(starts), dtype=np.uint64)
+        syllables = np.zeros(len(starts), dtype=np.uint64)
+        previous_vowel = np.zeros(len(starts), dtype=np.uint64)
+        active = slice(None)  # every word has a first 8 bytes
+        with np.errstate(over="ignore"):
+            for offset in range(0, int(word_lengths.max(initial=0)), 8):
+                if offset:
+                    active = np.flatnonzero(word_lengths > offset)
+                positions = starts[active] + offset
+                mask = _BYTE_MASKS[np.minimum(word_lengths[active] - offset, 8)]
+                hashes[active] = hashes[active] * _HASH_BASE + (text_bytes[positions] & mask)
+                vowels = vowel_bytes[positions] & mask
+                # A group starts at a vowel whose previous byte is not one
+                group_starts = vowels & ~((vowels << np.uint64(8)) | previous_vowel[active])
+                syllables[active] += (group_starts * _BYTE_SUM) >> np.uint64(56)
+                previous_vowel[active] = vowels >> np.uint64(56)
+        self.hashes = hashes
+
+        # Less a silent final "e" ("make" but not "table" or "the")
+        syllables = syllables.astype(np.int64)
+        silent_e = (chars[ends - 1] == ord("e")) & (word_lengths > 2) & (chars[np.maximum(ends - 2, 0)] != ord("l"))
+        self.syllables = np.maximum(syllables - (silent_e & (syllables > 1)), 1)
+
+        words_per_text = np.diff(np.searchsorted(starts, offsets))
+        self.doc = np.repeat(np.arange(len(texts)), words_per_text)
+
+        # A word ends a sentence when punctuation or a line break follows before the next word
+        last_in_doc = np.zeros(len(starts), dtype=bool)
+        last_in_doc[np.cumsum(words_per_text)[words_per_text > 0] - 1] = True
+        gaps = np.concatenate((starts[1:], ends[-1:])) - ends
+        mark_bytes = _read8(((classes & _SENTENCE_END) != 0).view(np.uint8))
+        marks = mark_bytes[ends] & _BYTE_MASKS[np.minimum(gaps, 8)]
+        sentence_end = last_in_doc | (marks != 0)
+        for offset in range(8, int(gaps.max(initial=0)), 8):
+            active = np.flatnonzero((gaps > offset) & ~sentence_end)
+            marks = mark_bytes[ends[active] + offset] & _BYTE_MASKS[np.minimum(gaps[active] - offset, 8)]
+            sentence_end[active] = marks != 0
+        self.sentence_end = sentence_end
+        self.count = len(texts)
+
+    def per_doc(self, weights: Optional[np.ndarray] = None) -> np.ndarray:
+        return np.bincount(self.doc, weights=weights, minlength=self.count)
+
+    def ngram_keys(self, n: int) -> np.ndarray:
+        """Sorted (text, n-word sequence) keys for every n-gram that stays inside one text."""
+        if len(self.hashes) < n:
+            return np.zeros(0, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            hashes = self.hashes[:len(self.hashes) - n + 1].copy()
+            for k in range(1, n):
+                hashes = hashes * _NGRAM_BASE + self.hashes[k:len(self.hashes) - n + 1 + k]
+            keys = hashes ^ (self.doc[:len(hashes)].astype(np.uint64) * _DOC_MIX)
+        same_doc = self.doc[:len(hashes)] == self.doc[n - 1:]
+        return np.sort(keys[same_doc])
+
+
+def split_keywords(keywords: Optional[str]) -> List[str]:
+    phrases = []
+    for phrase in KEYWORD_SPLIT_RE.split((keywords or "").lower()):
+        phrase = " ".join(phrase.split())
+        if WORD_RE.search(phrase) and phrase not in phrases:
+            phrases.append(phrase)
+    return phrases
+
+
+def _keyword_counts(words: _Words, keywords: Sequence[Optional[str]]):
+    """Occurrences of each text's keyword phrases, as (phrases, owning text, words per phrase, counts)."""
+    phrases, owners = [], []
+    for index, text_keywords in enumerate(keywords):
+        for phrase in split_keywords(text_keywords):
+            phrases.append(phrase)
+            owners.append(index)
+    owners = np.asarray(owners, dtype=np.int64)
+    counts = np.zeros(len(phrases), dtype=np.int64)
+    if not phrases:
+        return phrases, owners, np.zeros(0, dtype=np.int64), counts
+
+    phrase_words = _Words(phrases)
+    lengths = np.minimum(phrase_words.per_doc().astype(np.int64), MAX_PHRASE_WORDS)
+    first = np.searchsorted(phrase_words.doc, np.arange(len(phrases)))
+    with np.errstate(over="ignore"):
+        hashes = np.zeros(len(phrases), dtype=np.uint64)
+        for k in range(int(lengths.max(initial=0))):
+            active = lengths > k
+            hashes[active] = hashes[active] * _NGRAM_BASE + phrase_words.hashes[first[active] + k]
+        keys = hashes ^ (owners.astype(np.uint64) * _DOC_MIX)
+
+    for n in np.unique(lengths[lengths > 0]):
+        selected = lengths == n
+        ngrams = words.ngram_keys(int(n))
+        counts[selected] = np.searchsorted(ngrams, keys[selected], side="right") - np.searchsorted(ngrams, keys[selected])
+    return phrases, owners, lengths, counts
+
+
+def _length_component(lengths: np.ndarray, bounds) -> np.ndarray:
+    low, high = bounds
+    return np.where((lengths >= low) & (lengths <= high), 1.0, np.where(lengths > 0, 0.5, 0.0))
+
+
+def score_documents(
+    texts: Sequence[Optional[str]],
+    keywords: Sequence[Optional[str]],
+    titles: Optional[Sequence[Optional[str]]] = None,
+    meta_descriptions: Optional[Sequence[Optional[str]]] = None,
+) -> List[dict]:
+    """SEO reports for a batch of texts, each with a 0-100 "score".
+
+    Each chunk of texts is tokenized and scored as flat numpy arrays, so scoring a
+    user's full history costs a fraction of scoring each text on its own.
+    Checks that do not apply are left out of the score: keyword checks for texts
+    without keywords, and title or meta description checks when those sequences
+    are not given at all.
+    """
+    reports = []
+    for start in range(0, len(texts), CHUNK_SIZE):
+        end = start + CHUNK_SIZE
+        reports.extend(_score_chunk(
+            texts[start:end],
+            keywords[start:end],
+            titles[start:end] if titles is not None else None,
+            meta_descriptions[start:end] if meta_descriptions is not None else None,
+        ))
+    return reports
+
+
+def _score_chunk(texts, keywords, titles, meta_descriptions) -> List[dict]:
+    count = len(texts)
+    words = _Words(texts)
+    word_counts = words.per_doc()
+    sentence_counts = np.maximum(words.per_doc(words.sentence_end.astype(np.float64)), 1)
+    syllable_counts = words.per_doc(words.syllables.astype(np.float64))
+    safe_words = np.maximum(word_counts, 1)
+    readability = np.where(
+        word_counts > 0,
+        206.835 - 1.015 * (word_counts / sentence_counts) - 84.6 * (syllable_counts / safe_words),
+        0.0
+    )
+
+    phrases, owners, phrase_lengths, phrase_counts = _keyword_counts(words, keywords)
+    keyword_totals = np.bincount(owners, minlength=count)
+    has_keywords = keyword_totals > 0
+    coverage = np.bincount(owners, weights=(phrase_counts > 0).astype(np.float64), minlength=count) / np.maximum(keyword_totals, 1)
+    density = np.bincount(owners, weights=(phrase_counts * phrase_lengths).astype(np.float64), minlength=count) / safe_words * 100
+
+    low, high = KEYWORD_DENSITY
+    components = {
+        "keyword_coverage": coverage,
+        "keyword_density": np.where(density < low, density / low, np.clip(1.0 - (density - high) / high, 0.0, 1.0)),
+        "readability": np.clip(readability / READABILITY_TARGET, 0.0, 1.0),
+    }
+    applies = {"keyword_coverage": has_keywords, "keyword_density": has_keywords, "readability": np.ones(count, dtype=bool)}
+    title_lengths = meta_lengths = None
+    if titles is not None:
+        title_lengths = np.fromiter((len(title or "") for title in titles), dtype=np.int64, count=count)
+        components["title"] = _length_component(title_lengths, TITLE_LENGTH)
+        applies["title"] = np.ones(count, dtype=bool)
+    if meta_descriptions is not None:
+        meta_lengths = np.fromiter((len(meta or "") for meta in meta_descriptions), dtype=np.int64, count=count)
+        components["meta_description"] = _length_component(meta_lengths, META_DESCRIPTION_LENGTH)
+        applies["meta_description"] = np.ones(count, dtype=bool)
+
+    weighted = np.zeros(count)
+    total_weight = np.zeros(count)
+    for name, values in components.items():
+        weight = np.where(applies[name], WEIGHTS[name], 0.0)
+        weighted += values * weight
+        total_weight += weight
+    scores = np.round(weighted / total_weight * 100, 1)
+
+    # Reports are assembled per text, the only per-document Python in the pipeline
+    phrase_starts = np.searchsorted(owners, np.arange(count + 1))
+    reports = []
+    for i in range(count):
+        found = {phrases[j]: int(phrase_counts[j]) for j in range(phrase_starts[i], phrase_starts[i + 1])}
+        missing = [phrase for phrase, occurrences in found.items() if not occurrences]
+        issues = [f"Keyword not used: {phrase}" for phrase in missing]
+        if has_keywords[i] and density[i] > high:
+            issues.append(f"Keyword density {density[i]:.1f}% is above {high}%")
+        elif has_keywords[i] and density[i] < low and not missing:
+            issues.append(f"Keyword density {density[i]:.1f}% is below {low}%")
+        if readability[i] < READABILITY_TARGET:
+            issues.append(f"Readability {readability[i]:.1f} is below {READABILITY_TARGET:.0f}")
+        report = {
+            "version": SEO_VERSION,
+            "score": float(scores[i]),
+            "word_count": int(word_counts[i]),
+            "sentence_count": int(sentence_counts[i]),
+            "readability": round(float(readability[i]), 1),
+            "keyword_coverage": round(float(coverage[i]), 3) if has_keywords[i] else None,
+            "keyword_density": round(float(density[i]), 2) if has_keywords[i] else None,
+            "keywords": found,
+            "missing_keywords": missing,
+        }
+        if title_lengths is not None:
+            report["title_length"] = int(title_lengths[i])
+            if not TITLE_LENGTH[0] <= title_lengths[i] <= TITLE_LENGTH[1]:
+                issues.append(f"Title is {title_lengths[i]} characters; aim for {TITLE_LENGTH[0]}-{TITLE_LENGTH[1]}")
+        if meta_lengths is not None:
+            report["meta_description_length"] = int(meta_lengths[i])
+            if not META_DESCRIPTION_LENGTH[0] <= meta_lengths[i] <= META_DESCRIPTION_LENGTH[1]:
+                issues.append(
+                    f"Meta description is {meta_lengths[i]} characters; "
+                    f"aim for {META_DESCRIPTION_LENGTH[0]}-{META_DESCRIPTION_LENGTH[1]}"
+                )
+        report["issues"] = issues
+        reports.append(report)
+    return reports
+
+
+def needs_scoring(row) -> bool:
+    return row.seo_score is None or not row.seo_report or row.seo_report.get("version") != SEO_VERSION
+
+
+def score_generations(generations: Sequence) -> None:
+    """Score product descriptions against their SEO keywords.
+
+    A generation has no page title or meta description of its own (the product name
+    is rarely 30-60 characters), so both checks are skipped.
+    """
+    reports = score_documents(
+        [g.product_description for g in generations],
+        [g.seo_keywords for g in generations],
+    )
+    for generation, report in zip(generations, reports):
+        generation.seo_score = report["score"]
+        generation.seo_report = report
+
+
+def score_posts(posts: Sequence) -> None:
+    reports = score_documents(
+        [p.content for p in posts],
+        [p.keywords for p in posts],
+        titles=[p.title for p in posts],
+        meta_descriptions=[p.meta_description for p in posts],
+    )
+    for post, report in zip(posts, reports):
+        post.seo_score = report["score"]
+        post.seo_report = report
+
+
+def summarize_generations(generations: Sequence, limit: int = 5) -> dict:
+    """Aggregate stored SEO reports for a set of scored generations."""
+    scored = [g for g in generations if g.seo_report]
+    if not scored:
+        return {"generations": len(generations), "scored": 0, "score_bands": {"poor": 0, "fair": 0, "good": 0},
+                "most_missed_keywords": [], "lowest_scoring": []}
+
+    scores = np.fromiter((g.seo_score for g in scored), dtype=np.float64, count=len(scored))
+    readability = np.fromiter((g.seo_report["readability"] for g in scored), dtype=np.float64, count=len(scored))
+    coverage = np.array([g.seo_report["keyword_coverage"] for g in scored if g.seo_report["keyword_coverage"] is not None])
+    density = np.array([g.seo_report["keyword_density"] for g in scored if g.seo_report["keyword_density"] is not None])
+    missed = Counter(keyword for g in scored for keyword in g.seo_report["missing_keywords"])
+    lowest = np.argsort(scores, kind="stable")[:limit]
+
+    return {
+        "generations": len(generations),
+        "scored": len(scored),
+        "average_score": round(float(scores.mean()), 1),
+        "median_score": round(float(np.median(scores)), 1),
+        "score_bands": {
+            "poor": int((scores < 50).sum()),
+            "fair": int(((scores >= 50) & (scores < 80)).sum()),
+            "good": int((scores >= 80).sum()),
+        },
+        "average_readability": round(float(readability.mean()), 1),
+        "average_keyword_coverage": round(float(coverage.mean()), 3) if len(coverage) else None,
+        "keyword_density_out_of_range": int(((density < KEYWORD_DENSITY[0]) | (density > KEYWORD_DENSITY[1])).sum()),
+        "most_missed_keywords": [{"keyword": keyword, "missing_in": count} for keyword, count in missed.most_common(10)],
+        "lowest_scoring": [
+            {"id": scored[i].id, "product_name": scored[i].product_name, "seo_score": float(scores[i])} for i in lowest
+        ],
+    }
@@ -0,0 +1,79 @@
+"""View analytics: ingest cost per view, flush/compaction time and trending latency.
+
+    python -m benchmarks.bench_analytics --views 1000000 --posts 10000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.analytics import ViewRecorder
+from app.database import Base
+from benchmarks.stats import percentile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--views", type=int, default=1000000, help="views per simulated day")
+    parser.add_argument("--posts", type=int, default=10000)
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--flushes-per-hour", type=int, default=60)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "analytics.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+
+    rng = random.Random(3)
+    # Long-tailed popularity: a few posts get most of the traffic
+    post_ids = [min(args.posts, int(rng.paretovariate(1.2))) for _ in range(200000)]
+    recorder = ViewRecorder()
+    start = time.time() - args.days * 86400
+    views_per_flush = max(1, args.views // (24 * args.flushes_per_hour))
+
+    ingest_seconds = 0.0
+    flush_times = []
+    recorded = 0
+    for flush in range(args.days * 24 * args.flushes_per_hour):
+        timestamp = start + flush * 3600 / args.flushes_per_hour
+        batch = [post_ids[(recorded + i) % len(post_ids)] for i in range(views_per_flush)]
+
+        started = time.perf_counter()
+        for post_id in batch:
+            recorder.record(post_id, timestamp)
+        ingest_seconds += time.perf_counter() - started
+        recorded += len(batch)
+
+        started = time.perf_counter()
+        recorder.flush(session_factory)
+        flush_times.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    compacted = recorder.compact(session_factory)
+    compact_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    recorder.refresh_trending(session_factory)
+    refresh_ms = (time.perf_counter() - started) * 1000
+
+    reads = []
+    for _ in range(10000):
+        started = time.perf_counter()
+        recorder.trending("7d")
+        reads.append((time.perf_counter() - started) * 1e6)
+
+    print(f"views={recorded} over {args.days}d, {args.posts} posts")
+    print(f"ingest {ingest_seconds / recorded * 1e9:.0f}ns/view")
+    print(f"flush (incl. trending refresh) p50={statistics.median(flush_times):.1f}ms p99={percentile(flush_times, 99):.1f}ms")
+    print(f"compaction of {compacted} hourly rows={compact_ms:.0f}ms, trending refresh={refresh_ms:.1f}ms")
+    print(f"trending read p50={statistics.median(reads):.2f}us")
+
+
+if __name__ == "__main__":
+    main()
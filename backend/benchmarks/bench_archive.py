@@ -0,0 +1,142 @@
+"""Generation archiving: hot-path latency as the total dataset grows, before and after archiving.
+
+Inserts generations spread evenly over --span-days in growing checkpoints. At each
+checkpoint it times the user-facing queries on the hot table, archives everything
+older than --hot-days and times them again, along with rehydration of archived ids.
+
+    python -m benchmarks.bench_archive --total 10000000            # the full 10M-row run
+    python -m benchmarks.bench_archive --total 300000 --users 100  # quick check
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from app.archive import GenerationArchive
+from app.database import Base
+from app.models import ArchivedGeneration, Generation, User
+from benchmarks.stats import percentile
+from benchmarks.synthetic import FILLER_WORDS, TOPIC_WORDS
+
+CHUNK = 20000
+
+
+def insert_generations(engine, count: int, users: int, span_days: int, now: datetime, rng: random.Random, text_words: int):
+    vocabulary = TOPIC_WORDS + FILLER_WORDS
+
+    def text():
+        return " ".join(rng.choice(vocabulary) for _ in range(text_words))
+
+    table = Generation.__table__
+    for start in range(0, count, CHUNK):
+        rows = []
+        for _ in range(min(CHUNK, count - start)):
+            rows.append({
+                "user_id": rng.randint(1, users),
+                "product_name": f"Product {rng.randint(1, 10 ** 6)}",
+                "category": rng.choice(["Apparel", "Home", "Beauty", "Electronics"]),
+                "features": text(),
+                "product_description": text(),
+                "social_media_ads": text(),
+                "email_content": text(),
+                "is_favorited": rng.random() < 0.05,
+                "created_at": now - timedelta(seconds=rng.uniform(0, span_days * 86400)),
+            })
+        with engine.begin() as conn:
+            conn.execute(table.insert(), rows)
+
+
+def time_queries(session_factory, users: int, queries: int, rng: random.Random):
+    history, lookups = [], []
+    db = session_factory()
+    try:
+        max_id = db.query(func.max(Generation.id)).scalar() or 1
+        for _ in range(queries):
+            user_id = rng.randint(1, users)
+            started = time.perf_counter()
+            db.query(Generation).filter(Generation.user_id == user_id).order_by(Generation.created_at.desc()).all()
+            history.append((time.perf_counter() - started) * 1000)
+
+            generation_id = rng.randint(1, max_id)
+            started = time.perf_counter()
+            db.query(Generation).filter(Generation.id == generation_id, Generation.user_id == user_id).first()
+            lookups.append((time.perf_counter() - started) * 1000)
+            db.expunge_all()
+    finally:
+        db.close()
+    return history, lookups
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--total", type=int, default=10000000)
+    parser.add_argument("--checkpoints", type=int, default=3, help="geometric steps up to --total")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--span-days", type=int, default=1095)
+    parser.add_argument("--hot-days", type=int, default=90)
+    parser.add_argument("--text-words", type=int, default=12)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{os.path.join(directory, 'hot.db')}")
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    archive = GenerationArchive(os.path.join(directory, "archive"))
+    rng = random.Random(5)
+    now = datetime.utcnow()
+
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {"email": f"user{i}@example.com", "username": f"user{i}", "hashed_password": "x"} for i in range(args.users)
+        ])
+
+    checkpoints = sorted({max(1, int(args.total / 10 ** step)) for step in range(args.checkpoints)})
+    print(f"{'total rows':>11} {'hot rows':>10} {'stage':<8} {'history p50':>12} {'p95':>8} {'get p50':>8} {'p95':>8}  (ms)")
+    inserted = 0
+    for checkpoint in checkpoints:
+        started = time.perf_counter()
+        insert_generations(engine, checkpoint - inserted, args.users, args.span_days, now, rng, args.text_words)
+        insert_seconds = time.perf_counter() - started
+        inserted = checkpoint
+
+        for stage in ("before", "after"):
+            if stage == "after":
+                started = time.perf_counter()
+                moved = archive.archive_old(session_factory, now=now, older_than_days=args.hot_days)
+                archive_seconds = time.perf_counter() - started
+
+            db = session_factory()
+            try:
+                hot_rows = db.query(func.count(Generation.id)).scalar()
+            finally:
+                db.close()
+            history, lookups = time_queries(session_factory, args.users, args.queries, rng)
+            print(f"{checkpoint:>11} {hot_rows:>10} {stage:<8} {statistics.median(history):>12.2f} "
+                  f"{percentile(history, 95):>8.2f} {statistics.median(lookups):>8.3f} {percentile(lookups, 95):>8.3f}")
+
+        db = session_factory()
+        try:
+            archived = db.query(ArchivedGeneration.id, ArchivedGeneration.user_id).order_by(func.random()).limit(50).all()
+            rehydrations = []
+            for generation_id, user_id in archived:
+                started = time.perf_counter()
+                archive.rehydrate(db, generation_id, user_id)
+                rehydrations.append((time.perf_counter() - started) * 1000)
+        finally:
+            db.close()
+
+        archive_bytes = sum(os.path.getsize(os.path.join(archive.directory, name)) for name in os.listdir(archive.directory))
+        print(f"{'':>11} inserted in {insert_seconds:.1f}s, archived {moved} rows in {archive_seconds:.1f}s "
+              f"({moved / max(archive_seconds, 1e-9):.0f} rows/s), {len(archive.partitions())} partitions, "
+              f"{archive_bytes / 2 ** 20:.0f} MiB; rehydrate p50={statistics.median(rehydrations):.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Near-duplicate detection: index build time and lookup latency.
+
+    python -m benchmarks.bench_dedup --posts 100000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.dedup import DuplicateDetector
+from benchmarks.stats import percentile
+from benchmarks.synthetic import make_posts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    posts = make_posts(args.posts)
+    detector = DuplicateDetector()
+
+    started = time.perf_counter()
+    for post in posts:
+        detector.upsert(post)
+    build_seconds = time.perf_counter() - started
+
+    rng = random.Random(7)
+    topic_latencies, content_latencies = [], []
+    hits = 0
+    for _ in range(args.queries):
+        post = posts[rng.randrange(args.posts)]
+        started = time.perf_counter()
+        if detector.find_topic_duplicate(post.title, 0.8):
+            hits += 1
+        topic_latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        detector.find_content_duplicate(post, 0.7)
+        content_latencies.append((time.perf_counter() - started) * 1000)
+
+    print(f"posts={args.posts} build={build_seconds:.2f}s ({args.posts / build_seconds:.0f} posts/s)")
+    print(f"topic lookup p50={statistics.median(topic_latencies):.3f}ms p99={percentile(topic_latencies, 99):.3f}ms "
+          f"(exact-title hit rate {hits / args.queries:.0%})")
+    print(f"content lookup p50={statistics.median(content_latencies):.3f}ms p99={percentile(content_latencies, 99):.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Sitemap and feed generation time, incremental regeneration and serving throughput.
+
+    python -m benchmarks.bench_feeds --posts 100000
+"""
+import argparse
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.feeds import feed_store
+from app.routes import feeds
+from benchmarks.synthetic import make_posts
+
+DOCUMENTS = ("sitemap.xml", "feed/rss.xml", "feed/atom.xml")
+
+
+def render_all():
+    names = list(DOCUMENTS) + [f"sitemaps/blog-{shard}.xml" for shard in sorted(feed_store._shards)]
+    return sum(len(feed_store.get(name).body) for name in names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    posts = make_posts(args.posts, content_words=10)
+
+    started = time.perf_counter()
+    for post in posts:
+        feed_store.upsert(post)
+    feed_store.loaded = True
+    load_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    total_bytes = render_all()
+    render_seconds = time.perf_counter() - started
+
+    post = posts[len(posts) // 2]
+    post.title += " (updated)"
+    started = time.perf_counter()
+    feed_store.upsert(post)
+    incremental_bytes = render_all()
+    incremental_ms = (time.perf_counter() - started) * 1000
+
+    app = FastAPI()
+    app.include_router(feeds.router)
+    client = TestClient(app)
+    etag = client.get("/sitemap.xml").headers["etag"]
+
+    results = {}
+    for label, path, headers in (
+        ("sitemap.xml", "/sitemap.xml", {}),
+        ("sitemap shard", "/sitemaps/blog-1.xml", {}),
+        ("rss", "/feed/rss.xml", {}),
+        ("sitemap.xml 304", "/sitemap.xml", {"If-None-Match": etag}),
+    ):
+        started = time.perf_counter()
+        for _ in range(args.requests):
+            client.get(path, headers=headers)
+        results[label] = args.requests / (time.perf_counter() - started)
+
+    print(f"posts={args.posts} load={load_seconds:.2f}s full render={render_seconds * 1000:.0f}ms ({total_bytes / 1e6:.1f}MB)")
+    print(f"incremental update + re-render={incremental_ms:.1f}ms ({incremental_bytes / 1e6:.1f}MB served)")
+    for label, rate in results.items():
+        print(f"serve {label}: {rate:.0f} req/s (in-process, single client)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Model routing against simulated models: p95 per section, model mix and cost, adaptive vs static.
+
+Runs three phases (normal, gpt-4o-mini slowdown, recovery) through the fake LLM
+with per-model latency profiles. "static" always uses each section's first
+choice; "adaptive" is the model router. Latencies, targets and the stats window
+are divided by --time-scale so a run takes seconds.
+
+    python -m benchmarks.bench_model_router --calls 200 --time-scale 100
+"""
+import argparse
+import copy
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Real-world-ish profiles in milliseconds before --time-scale is applied
+PROFILES = {
+    "gpt-4o": {"base_ms": 700, "per_token_ms": 10, "jitter": 0.25, "error_rate": 0.01},
+    "gpt-4o-mini": {"base_ms": 400, "per_token_ms": 8, "jitter": 0.2, "error_rate": 0.01},
+    "gpt-3.5-turbo": {"base_ms": 300, "per_token_ms": 5, "jitter": 0.2, "error_rate": 0.01},
+}
+PHASES = [
+    ("normal", {}),
+    ("mini-slowdown", {"gpt-4o-mini": {"per_token_ms": 25, "error_rate": 0.05}}),
+    ("recovered", {}),
+]
+
+
+def scaled_profiles(overrides: dict, time_scale: float) -> dict:
+    profiles = copy.deepcopy(PROFILES)
+    for model, changes in overrides.items():
+        profiles[model].update(changes)
+    for profile in profiles.values():
+        profile["base_ms"] /= time_scale
+        profile["per_token_ms"] /= time_scale
+    return profiles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200, help="calls per section per phase")
+    parser.add_argument("--time-scale", type=float, default=100)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    os.environ["LLM_BACKEND"] = "fake"
+    sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+    from app.config import settings
+    from app.llm import chat_completion, fake_llm
+    from app.model_router import DEFAULT_CATALOG, ModelRouter, estimate_tokens
+    from benchmarks.stats import percentile
+
+    catalog = copy.deepcopy(DEFAULT_CATALOG)
+    for policy in catalog["sections"]:
+        policy["p95_target_ms"] /= args.time_scale
+    settings.MODEL_STATS_WINDOW_SECONDS = 300 / args.time_scale
+    sections = [policy["section"] for policy in catalog["sections"]]
+    messages = {section: [{"role": "user", "content": f"Write the {section} for a sample product. " * 20}] for section in sections}
+
+    print(f"{'strategy':<9} {'phase':<14} {'section':<12} {'p95 ms':>8} {'target':>7} {'errors':>7} {'cost $':>8}  models")
+    for strategy in ("static", "adaptive"):
+        router = ModelRouter(catalog)
+
+        def call(section):
+            policy = router.sections[section]
+            started = time.perf_counter()
+            try:
+                if strategy == "static":
+                    model = policy.models[0]
+                    chat_completion(messages[section], model=model, max_tokens=policy.max_tokens)
+                else:
+                    _, model = router.complete(section, messages[section])
+            except Exception:
+                return section, None, (time.perf_counter() - started) * 1000
+            return section, model, (time.perf_counter() - started) * 1000
+
+        with ThreadPoolExecutor(args.workers) as pool:
+            for phase, overrides in PHASES:
+                fake_llm.profiles = scaled_profiles(overrides, args.time_scale)
+                latencies, mix, errors = defaultdict(list), defaultdict(Counter), Counter()
+                for section, model, latency_ms in pool.map(call, [s for _ in range(args.calls) for s in sections]):
+                    latencies[section].append(latency_ms)
+                    if model is None:
+                        errors[section] += 1
+                    else:
+                        mix[section][model] += 1
+
+                for section in sections:
+                    policy = router.sections[section]
+                    prompt_tokens = estimate_tokens(messages[section])
+                    cost = sum(router.models[model].estimated_cost(prompt_tokens, policy.max_tokens) * count
+                               for model, count in mix[section].items())
+                    models = ", ".join(f"{model} {count / args.calls:.0%}" for model, count in mix[section].most_common())
+                    print(f"{strategy:<9} {phase:<14} {section:<12} {percentile(latencies[section], 95):>8.1f} "
+                          f"{policy.p95_target_ms:>7.0f} {errors[section]:>7} {cost:>8.3f}  {models}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Related-posts index: build time and query latency.
+
+    python -m benchmarks.bench_related --posts 100000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.related import RelatedPostsIndex
+from benchmarks.stats import percentile
+from benchmarks.synthetic import make_posts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args()
+
+    posts = make_posts(args.posts)
+    index = RelatedPostsIndex()
+
+    started = time.perf_counter()
+    for post in posts:
+        index.upsert(post)
+    build_seconds = time.perf_counter() - started
+
+    rng = random.Random(7)
+    latencies = []
+    for _ in range(args.queries):
+        post_id = rng.randint(1, args.posts)
+        index._cache.clear()
+        started = time.perf_counter()
+        index.related(post_id, args.limit)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    index.upsert(posts[0])
+    update_ms = (time.perf_counter() - started) * 1000
+
+    print(f"posts={args.posts} build={build_seconds:.2f}s ({args.posts / build_seconds:.0f} posts/s)")
+    print(f"query (uncached) p50={statistics.median(latencies):.2f}ms "
+          f"p95={percentile(latencies, 95):.2f}ms p99={percentile(latencies, 99):.2f}ms")
+    print(f"incremental update={update_ms:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""SEO scoring throughput: documents per second by batch size, for product descriptions and blog posts.
+
+Batch size 1 is scoring on create or update; larger batches are the SEO report
+scoring a user's whole history at once.
+
+    python -m benchmarks.bench_seo --documents 20000
+"""
+import argparse
+import random
+import time
+
+from app.seo import score_documents
+from benchmarks.synthetic import FILLER_WORDS, TOPIC_WORDS
+
+TARGET_DOCS_PER_SECOND = 10000
+
+
+def make_documents(count: int, words: int, seed: int):
+    rng = random.Random(seed)
+    texts, keywords, titles, metas = [], [], [], []
+    for _ in range(count):
+        focus = rng.sample(TOPIC_WORDS, 4)
+        sentences = []
+        remaining = words
+        while remaining > 0:
+            length = min(remaining, rng.randint(8, 20))
+            sentence = [rng.choice(focus) if rng.random() < 0.1 else rng.choice(FILLER_WORDS) for _ in range(length)]
+            sentences.append(" ".join(sentence).capitalize() + rng.choice([".", ".", "!", "?"]))
+            remaining -= length
+        texts.append(" ".join(sentences))
+        keywords.append(", ".join([f"{focus[0]} {focus[1]}", focus[2], focus[3]]))
+        titles.append(" ".join(w.capitalize() for w in focus) + " " + rng.choice(FILLER_WORDS).capitalize())
+        metas.append(" ".join(rng.choice(FILLER_WORDS) for _ in range(rng.randint(12, 28))))
+    return texts, keywords, titles, metas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=20000)
+    parser.add_argument("--description-words", type=int, default=150)
+    parser.add_argument("--blog-words", type=int, default=1200)
+    parser.add_argument("--batch-sizes", default="1,100,1000,10000")
+    args = parser.parse_args()
+
+    corpora = {
+        "description": make_documents(args.documents, args.description_words, seed=1),
+        "blog": make_documents(max(args.documents // 8, 1), args.blog_words, seed=2),
+    }
+    print(f"{'document':<12} {'words':>6} {'batch':>6} {'docs/s':>9} {'words/s':>11}")
+    for kind, (texts, keywords, titles, metas) in corpora.items():
+        word_count = sum(len(text.split()) for text in texts)
+        for batch in (int(size) for size in args.batch_sizes.split(",")):
+            # Single-document calls are far slower per document; a sample of them is enough
+            total = min(len(texts), 2000) if batch == 1 else len(texts)
+            started = time.perf_counter()
+            for start in range(0, total, batch):
+                end = min(start + batch, total)
+                score_documents(texts[start:end], keywords[start:end], titles[start:end], metas[start:end])
+            elapsed = time.perf_counter() - started
+            per_second = total / elapsed
+            print(f"{kind:<12} {word_count // len(texts):>6} {batch:>6} {per_second:>9.0f} "
+                  f"{per_second * word_count / len(texts):>11.0f}")
+
+    # Both document kinds are held to the same target; blog posts carry 8x the words
+    for kind, (texts, keywords, titles, metas) in corpora.items():
+        batch = min(len(texts), 10000)
+        started = time.perf_counter()
+        score_documents(texts[:batch], keywords[:batch], titles[:batch], metas[:batch])
+        per_second = batch / (time.perf_counter() - started)
+        verdict = "met" if per_second >= TARGET_DOCS_PER_SECOND else "missed"
+        print(f"history scoring: {per_second:.0f} {kind} docs/s in batches of {batch} "
+              f"(target {TARGET_DOCS_PER_SECOND} docs/s {verdict})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Synthetic users, generations and blog posts for the end-to-end benchmarks."""
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy.orm import sessionmaker
+
+from app.auth import get_password_hash
+from app.models import BlogPost, Generation, User
+from benchmarks.synthetic import FILLER_WORDS, TOPIC_WORDS, make_posts
+
+PASSWORD = "benchmark-password"
+CHUNK = 5000
+
+
+def _text(rng: random.Random, words: int) -> str:
+    vocabulary = TOPIC_WORDS + FILLER_WORDS
+    return " ".join(rng.choice(vocabulary) for _ in range(words))
+
+
+def _insert(engine, table, rows: List[dict]):
+    for start in range(0, len(rows), CHUNK):
+        with engine.begin() as conn:
+            conn.execute(table.insert(), rows[start:start + CHUNK])
+
+
+def seed(engine, users: int, generations: int, posts: int, seed: int = 42) -> Dict[str, list]:
+    """Bulk-insert the dataset and return the identifiers the scenarios need."""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    hashed_password = get_password_hash(PASSWORD)
+
+    usernames = [f"bench-user-{i}" for i in range(users)]
+    _insert(engine, User.__table__, [
+        {"email": f"{name}@example.com", "username": name, "hashed_password": hashed_password,
+         "is_active": True, "created_at": now}
+        for name in usernames
+    ])
+
+    session = sessionmaker(bind=engine)()
+    try:
+        user_ids = [user_id for (user_id,) in session.query(User.id).filter(User.username.in_(usernames)).order_by(User.id)]
+    finally:
+        session.close()
+
+    generation_rows = []
+    for i in range(generations):
+        generation_rows.append({
+            "user_id": user_ids[i % len(user_ids)],
+            "product_name": f"Product {i}",
+            "category": rng.choice(["Apparel", "Home", "Beauty", "Electronics", "Outdoors"]),
+            "features": _text(rng, 15),
+            "target_audience": _text(rng, 5),
+            "tone_of_voice": rng.choice(["Friendly", "Professional", "Playful"]),
+            "seo_keywords": ", ".join(rng.sample(TOPIC_WORDS, 4)),
+            "product_description": _text(rng, 120),
+            "social_media_ads": _text(rng, 80),
+            "email_content": _text(rng, 120),
+            "is_favorited": rng.random() < 0.1,
+            "created_at": now - timedelta(minutes=generations - i),
+        })
+        if len(generation_rows) == CHUNK:
+            _insert(engine, Generation.__table__, generation_rows)
+            generation_rows = []
+    _insert(engine, Generation.__table__, generation_rows)
+
+    post_rows = []
+    slugs = []
+    for post in make_posts(posts, seed=seed):
+        slugs.append(post.slug)
+        post_rows.append({
+            "title": post.title,
+            "slug": post.slug,
+            "content": post.content,
+            "excerpt": post.excerpt,
+            "meta_description": post.meta_description,
+            "keywords": post.keywords,
+            "category": post.category,
+            "tags": post.tags,
+            "is_published": True,
+            "view_count": 0,
+            "user_id": user_ids[0],
+            "created_at": post.created_at,
+            "published_at": post.published_at,
+        })
+        if len(post_rows) == CHUNK:
+            _insert(engine, BlogPost.__table__, post_rows)
+            post_rows = []
+    _insert(engine, BlogPost.__table__, post_rows)
+
+    session = sessionmaker(bind=engine)()
+    try:
+        generation_ids = {
+            user_id: [gid for (gid,) in session.query(Generation.id).filter(Generation.user_id == user_id).limit(50)]
+            for user_id in user_ids[:10]
+        }
+    finally:
+        session.close()
+
+    return {"usernames": usernames, "user_ids": user_ids, "generation_ids": generation_ids, "slugs": slugs}
@@ -0,0 +1,71 @@
+"""Asynchronous "replication" between SQLite files, for trying read replicas locally.
+
+Copies the primary database onto each replica file with SQLite's online backup
+API every --interval seconds, so replicas trail the primary by up to that long.
+
+    python -m benchmarks.sqlite_replica eqori.db eqori-replica.db --interval 1
+    DATABASE_REPLICA_URLS=sqlite:///./eqori-replica.db uvicorn app.main:app
+"""
+import argparse
+import sqlite3
+import threading
+import time
+from typing import List
+
+
+class SQLiteReplicator:
+    def __init__(self, primary_path: str, replica_paths: List[str], interval: float = 1.0):
+        self.primary_path = primary_path
+        self.replica_paths = replica_paths
+        self.interval = interval
+        self.paused = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sync_once(self):
+        source = sqlite3.connect(self.primary_path, timeout=30)
+        try:
+            for path in self.replica_paths:
+                target = sqlite3.connect(path, timeout=30)
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+        finally:
+            source.close()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sqlite-replicator", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if not self.paused.is_set():
+                self.sync_once()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("primary")
+    parser.add_argument("replicas", nargs="+")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between copies")
+    args = parser.parse_args()
+
+    replicator = SQLiteReplicator(args.primary, args.replicas, args.interval)
+    replicator.sync_once()
+    replicator.start()
+    print(f"replicating {args.primary} -> {', '.join(args.replicas)} every {args.interval}s (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        replicator.stop()
+
+
+if __name__ == "__main__":
+    main()
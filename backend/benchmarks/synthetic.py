@@ -0,0 +1,64 @@
+import random
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import List
+
+TOPIC_WORDS = """
+marketing seo email social ads conversion funnel audience brand content product description copy
+ecommerce shopify analytics campaign retention engagement automation newsletter influencer video
+keyword ranking traffic backlink landing page checkout cart pricing discount loyalty review rating
+personalization segmentation persona journey storytelling headline subject line open rate click
+""".split()
+
+FILLER_WORDS = """
+strategy growth customer business team results data insight tool guide tips example practice trend
+improve increase build create measure test launch optimize plan grow scale learn share drive win
+simple effective proven modern smart quick powerful essential complete practical ultimate better
+""".split()
+
+
+SYLLABLES = [c + v for c in "bcdfgklmnprstvz" for v in "aeiou"]
+
+
+def long_tail_vocabulary(size: int, seed: int = 1) -> List[str]:
+    """Pronounceable made-up words standing in for a real corpus' long tail of terms."""
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def make_words(rng: random.Random, count: int, focus: List[str]) -> str:
+    # Mostly filler with a topical bias so similarity is meaningful
+    return " ".join(rng.choice(focus) if rng.random() < 0.3 else rng.choice(FILLER_WORDS) for _ in range(count))
+
+
+def make_posts(count: int, seed: int = 42, content_words: int = 300) -> List[SimpleNamespace]:
+    """BlogPost-shaped objects with a small topical vocabulary per post."""
+    rng = random.Random(seed)
+    long_tail = long_tail_vocabulary(20000, seed)
+    start = datetime(2024, 1, 1)
+    posts = []
+    for post_id in range(1, count + 1):
+        focus = rng.sample(TOPIC_WORDS, 3) + rng.sample(long_tail, 3)
+        rng.shuffle(focus)
+        title = " ".join(w.capitalize() for w in focus[:4]) + " " + rng.choice(FILLER_WORDS).capitalize()
+        published_at = start + timedelta(minutes=10 * post_id)
+        posts.append(SimpleNamespace(
+            id=post_id,
+            slug=f"{'-'.join(focus[:4])}-{post_id}",
+            title=title,
+            content=make_words(rng, content_words, focus),
+            excerpt=make_words(rng, 25, focus),
+            meta_description=make_words(rng, 20, focus),
+            keywords=", ".join(focus[:4]),
+            tags=", ".join(focus[2:5]),
+            category=rng.choice(["AI Marketing", "E-commerce", "SEO", "Content Marketing", "Automation"]),
+            is_published=True,
+            view_count=0,
+            created_at=published_at,
+            updated_at=None,
+            published_at=published_at,
+        ))
+    return posts
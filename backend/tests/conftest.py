@@ -0,0 +1,32 @@
+import os
+import tempfile
+
+# The app reads its settings at import time, so point it at a throwaway database first
+_directory = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_directory, 'test.db')}"
+os.environ["ARCHIVE_DIR"] = os.path.join(_directory, "archive")
+os.environ["LLM_BACKEND"] = "fake"
+
+import uuid
+from contextlib import asynccontextmanager
+
+import httpx
+import pytest
+
+from app.main import app
+
+
+@asynccontextmanager
+async def _logged_in_client():
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test", timeout=30) as client:
+        username = f"user-{uuid.uuid4().hex[:12]}"
+        await client.post("/auth/register", json={"email": f"{username}@example.com", "username": username, "password": "secret"})
+        response = await client.post("/auth/login", data={"username": username, "password": "secret"})
+        client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+        yield client
+
+
+@pytest.fixture
+def logged_in_client():
+    """Opens a client signed in as a new user: `async with logged_in_client() as client`."""
+    return _logged_in_client
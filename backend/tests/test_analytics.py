@@ -0,0 +1,64 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.analytics import DAY, HOUR, ViewRecorder
+from app.database import Base
+from app.models import PostViewRollup
+
+NOW = datetime(2024, 5, 10, 15, 30)
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'views.db'}")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+def add_rollups(session_factory, rows):
+    db = session_factory()
+    try:
+        db.add_all(PostViewRollup(post_id=post_id, granularity=granularity, bucket_start=start, views=views)
+                   for post_id, granularity, start, views in rows)
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_trending_windows_count_only_the_overlapping_part_of_their_first_bucket(session_factory):
+    add_rollups(session_factory, [
+        (1, HOUR, datetime(2024, 5, 9, 14), 100),   # before the 24h window, inside 7d
+        (1, HOUR, datetime(2024, 5, 9, 15), 10),    # half inside the 24h window
+        (1, HOUR, datetime(2024, 5, 10, 10), 7),
+        (2, DAY, datetime(2024, 5, 2), 1000),       # before the 7d window
+        (2, DAY, datetime(2024, 5, 3), 48),         # 8.5 of its 24 hours inside the 7d window
+        (2, DAY, datetime(2024, 5, 6), 3),
+    ])
+    recorder = ViewRecorder()
+
+    recorder.refresh_trending(session_factory, now=NOW)
+
+    assert recorder.trending("24h") == [(1, 12)]
+    assert recorder.trending("7d") == [(1, 117), (2, 20)]
+
+
+def test_compaction_keeps_view_totals(session_factory):
+    recorder = ViewRecorder()
+    for hour in (9, 10, 11):
+        for _ in range(hour):
+            recorder.record(3, timestamp=datetime(2024, 5, 6, hour, 5).timestamp() - datetime(1970, 1, 1).timestamp())
+    recorder.flush(session_factory)
+
+    assert recorder.compact(session_factory, now=NOW) == 3
+
+    db = session_factory()
+    try:
+        rows = db.query(PostViewRollup.granularity, PostViewRollup.bucket_start, PostViewRollup.views).all()
+    finally:
+        db.close()
+    assert rows == [(DAY, datetime(2024, 5, 6), 30)]
+    recorder.refresh_trending(session_factory, now=NOW)
+    assert recorder.trending("7d") == [(3, 30)]
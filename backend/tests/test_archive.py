@@ -0,0 +1,129 @@
+import asyncio
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, text
+
+from app.archive import generation_archive
+from app.database import Base, SessionLocal, add_missing_columns, use_autoincrement_ids
+from app.models import ArchivedGeneration, Generation
+
+
+async def archived_generation(client, product_name):
+    """Create a generation, age it past the cutoff and archive it."""
+    response = await client.post("/generation/generate", json={"product_name": product_name})
+    db = SessionLocal()
+    try:
+        db.query(Generation).filter(Generation.id == response.json()["id"]).update(
+            {"created_at": datetime.utcnow() - timedelta(days=400)}
+        )
+        db.commit()
+    finally:
+        db.close()
+    generation_archive.archive_old(SessionLocal, older_than_days=90)
+    return response
+
+
+def test_new_generation_never_takes_an_archived_id(logged_in_client):
+    async def scenario():
+        async with logged_in_client() as client:
+            # The archived generation was the newest row, which is where SQLite used to reuse ids
+            old = await archived_generation(client, "Old Kettle")
+
+            new = await client.post("/generation/generate", json={"product_name": "New Kettle"})
+            generation_archive.archive_old(SessionLocal, older_than_days=90)
+            history = await client.get("/generation/history")
+            restored = await client.get(f"/generation/{old.json()['id']}")
+            return old, new, history, restored
+
+    old, new, history, restored = asyncio.run(scenario())
+
+    assert new.json()["id"] > old.json()["id"]
+    assert [(item["product_name"], item["archived"]) for item in history.json()] == [("New Kettle", False), ("Old Kettle", True)]
+    assert restored.status_code == 200
+    assert restored.json()["product_name"] == "Old Kettle"
+
+
+def test_history_lists_archived_generations_without_opening_the_archive(logged_in_client, monkeypatch):
+    async def scenario():
+        async with logged_in_client() as client:
+            old = await archived_generation(client, "Linen Apron")
+
+            def no_archive_access(*args, **kwargs):
+                raise AssertionError("history opened an archive file")
+
+            monkeypatch.setattr(generation_archive, "_connect", no_archive_access)
+            history = await client.get("/generation/history")
+            return old, history
+
+    old, history = asyncio.run(scenario())
+
+    assert history.status_code == 200
+    assert [(item["id"], item["product_name"], item["archived"]) for item in history.json()] == [
+        (old.json()["id"], "Linen Apron", True)
+    ]
+
+
+def test_concurrent_rehydration_of_one_generation_returns_it_to_both(logged_in_client, monkeypatch):
+    async def scenario():
+        async with logged_in_client() as client:
+            return await archived_generation(client, "Wool Scarf")
+
+    old = asyncio.run(scenario()).json()
+
+    # Hold both callers until each has found the archive stub, so they race on the insert
+    barrier = threading.Barrier(2)
+    connect = generation_archive._connect
+    waited = threading.local()
+
+    def racing_connect(*args, **kwargs):
+        if not getattr(waited, "done", False):
+            waited.done = True
+            barrier.wait(timeout=10)
+        return connect(*args, **kwargs)
+
+    monkeypatch.setattr(generation_archive, "_connect", racing_connect)
+    results, errors = [], []
+
+    def rehydrate():
+        db = SessionLocal()
+        try:
+            generation = generation_archive.rehydrate(db, old["id"], old["user_id"])
+            results.append((generation.id, generation.product_name))
+        except Exception as error:
+            errors.append(error)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=rehydrate) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert results == [(old["id"], "Wool Scarf")] * 2
+
+
+def test_legacy_sqlite_table_is_rebuilt_with_ids_past_the_archive(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        # A generations table as an earlier release created it: plain rowid ids, fewer columns
+        conn.execute(text("DROP TABLE generations"))
+        conn.execute(text(
+            "CREATE TABLE generations (id INTEGER PRIMARY KEY, user_id INTEGER, product_name VARCHAR, created_at DATETIME)"
+        ))
+        conn.execute(text("INSERT INTO generations (id, user_id, product_name) VALUES (1, 1, 'a'), (2, 1, 'b')"))
+        conn.execute(ArchivedGeneration.__table__.insert(), [{"id": 7, "user_id": 1, "partition": "2024-01"}])
+
+    add_missing_columns(engine)
+    use_autoincrement_ids(engine, reserved_ids={"generations": ArchivedGeneration.__table__.c.id})
+    use_autoincrement_ids(engine, reserved_ids={"generations": ArchivedGeneration.__table__.c.id})
+
+    with engine.begin() as conn:
+        assert [row.product_name for row in conn.execute(text("SELECT product_name FROM generations ORDER BY id"))] == ["a", "b"]
+        new_id = conn.execute(Generation.__table__.insert().values(user_id=1, product_name="c")).inserted_primary_key[0]
+        indexes = {row.name for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+    assert new_id == 8
+    assert "ix_generations_user_created" in indexes
@@ -0,0 +1,54 @@
+import asyncio
+import threading
+import uuid
+
+from app.related import related_index
+
+
+def test_retry_after_success_replays_the_post_instead_of_flagging_a_duplicate(logged_in_client):
+    topic = f"Email subject lines that convert {uuid.uuid4().hex[:8]}"
+
+    async def scenario():
+        async with logged_in_client() as client:
+            params = {"topic": topic}
+            first = await client.post("/blog/generate", params=params, headers={"Idempotency-Key": "k1"})
+            retry = await client.post("/blog/generate", params=params, headers={"Idempotency-Key": "k1"})
+            fresh = await client.post("/blog/generate", params=params, headers={"Idempotency-Key": "k2"})
+            return first, retry, fresh
+
+    first, retry, fresh = asyncio.run(scenario())
+
+    assert first.status_code == 200
+    assert retry.status_code == 200
+    assert retry.json()["id"] == first.json()["id"]
+    # A new request for the same topic is still caught by the duplicate check
+    assert fresh.status_code == 409
+
+
+def test_post_updates_reach_the_related_index_off_the_event_loop(logged_in_client, monkeypatch):
+    threads = []
+    upsert, remove = related_index.upsert, related_index.remove
+
+    def recording(method):
+        def record(*args):
+            threads.append(threading.current_thread())
+            return method(*args)
+        return record
+
+    monkeypatch.setattr(related_index, "upsert", recording(upsert))
+    monkeypatch.setattr(related_index, "remove", recording(remove))
+
+    async def scenario():
+        async with logged_in_client() as client:
+            post = await client.post("/blog/generate", params={"topic": f"Packaging that sells {uuid.uuid4().hex[:8]}"})
+            post_id = post.json()["id"]
+            updated = await client.put(f"/blog/{post_id}", json={"excerpt": "A shorter excerpt"})
+            deleted = await client.delete(f"/blog/{post_id}")
+            return updated, deleted
+
+    updated, deleted = asyncio.run(scenario())
+
+    assert updated.status_code == 200 and deleted.status_code == 200
+    # Create, update and delete; a compaction on any of them must not stall the loop
+    assert len(threads) == 3
+    assert threading.main_thread() not in threads
@@ -0,0 +1,136 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app import coalescing
+from app.routes import generation
+
+N = 8
+
+
+@pytest.fixture
+def upstream_calls(monkeypatch):
+    """Replace the LLM-backed generators with slow fakes and count how often each runs."""
+    calls = []
+    lock = threading.Lock()
+
+    def fake(section):
+        def generate(product_name, *args):
+            with lock:
+                calls.append((section, product_name))
+            # Long enough for every concurrent request to arrive while the first is in flight
+            time.sleep(0.3)
+            return f"{section} for {product_name}", "fake-model"
+        return generate
+
+    monkeypatch.setattr(generation, "generate_product_description", fake("description"))
+    monkeypatch.setattr(generation, "generate_social_media_ads", fake("ads"))
+    monkeypatch.setattr(generation, "generate_email_content", fake("email"))
+    return calls
+
+
+def descriptions(calls):
+    return [name for section, name in calls if section == "description"]
+
+
+def test_identical_concurrent_requests_make_one_upstream_call(upstream_calls, logged_in_client):
+    async def scenario():
+        async with logged_in_client() as client:
+            return await asyncio.gather(*(
+                client.post("/generation/generate", json={"product_name": "Trail Shoe"}) for _ in range(N)
+            ))
+
+    responses = asyncio.run(scenario())
+
+    assert [response.status_code for response in responses] == [200] * N
+    assert len({response.json()["id"] for response in responses}) == 1
+    assert descriptions(upstream_calls) == ["Trail Shoe"]
+
+
+def test_concurrent_retries_with_one_idempotency_key_make_one_upstream_call(upstream_calls, logged_in_client):
+    async def scenario():
+        async with logged_in_client() as client:
+            return await asyncio.gather(*(
+                client.post("/generation/generate", json={"product_name": "Rain Jacket"}, headers={"Idempotency-Key": "retry-1"})
+                for _ in range(N)
+            ))
+
+    responses = asyncio.run(scenario())
+
+    assert [response.status_code for response in responses] == [200] * N
+    assert len({response.json()["id"] for response in responses}) == 1
+    assert descriptions(upstream_calls) == ["Rain Jacket"]
+
+
+def test_idempotency_key_reused_with_different_payload_is_rejected(upstream_calls, logged_in_client):
+    async def scenario():
+        async with logged_in_client() as client:
+            return await asyncio.gather(*(
+                client.post("/generation/generate", json={"product_name": f"Widget {i}"}, headers={"Idempotency-Key": "shared"})
+                for i in range(3)
+            ))
+
+    responses = asyncio.run(scenario())
+
+    assert sorted(response.status_code for response in responses) == [200, 422, 422]
+    accepted = next(response for response in responses if response.status_code == 200)
+    assert descriptions(upstream_calls) == [accepted.json()["product_name"]]
+
+
+def test_idempotency_key_of_deleted_generation_starts_a_fresh_request(upstream_calls, logged_in_client):
+    async def scenario():
+        async with logged_in_client() as client:
+            headers = {"Idempotency-Key": "deleted-later"}
+            first = await client.post("/generation/generate", json={"product_name": "Desk Lamp"}, headers=headers)
+            await client.delete(f"/generation/{first.json()['id']}")
+            retry = await client.post("/generation/generate", json={"product_name": "Desk Lamp"}, headers=headers)
+            replay = await client.post("/generation/generate", json={"product_name": "Desk Lamp"}, headers=headers)
+            return first, retry, replay
+
+    first, retry, replay = asyncio.run(scenario())
+
+    assert retry.status_code == 200
+    assert retry.json()["id"] != first.json()["id"]
+    assert replay.json()["id"] == retry.json()["id"]
+    assert descriptions(upstream_calls) == ["Desk Lamp", "Desk Lamp"]
+
+
+class _StoredKey:
+    """Just enough of a Session to hand find_idempotent_resource one stored key."""
+
+    def __init__(self, record):
+        self.record = record
+        self.deleted = False
+
+    def query(self, model):
+        return self
+
+    def filter(self, *conditions):
+        return self
+
+    def first(self):
+        return self.record
+
+    def delete(self, record):
+        self.deleted = True
+
+    def commit(self):
+        pass
+
+
+@pytest.mark.parametrize("hours_ago, expired", [(20, False), (30, True)])
+def test_idempotency_window_compares_stored_times_in_utc(monkeypatch, hours_ago, expired):
+    monkeypatch.setattr(coalescing.settings, "IDEMPOTENCY_WINDOW_HOURS", 24)
+    # Postgres hands back timestamptz values in the session time zone
+    pacific = timezone(timedelta(hours=-8))
+    record = SimpleNamespace(created_at=datetime.now(pacific) - timedelta(hours=hours_ago), request_hash="h", resource_id=7)
+    db = _StoredKey(record)
+
+    found = coalescing.find_idempotent_resource(db, 1, "generation", "k", "h")
+
+    assert (found is None) == expired
+    assert db.deleted == expired
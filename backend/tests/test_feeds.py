@@ -0,0 +1,24 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.feeds import SITEMAP_URLS_PER_FILE, FeedStore, sitemap_shard_name
+
+
+def post(post_id):
+    return SimpleNamespace(id=post_id, slug=f"post-{post_id}", title=f"Post {post_id}", excerpt="", meta_description="",
+                           category=None, created_at=datetime(2024, 1, 1), updated_at=None, published_at=None)
+
+
+def test_no_sitemap_shard_exceeds_the_protocol_limit():
+    store = FeedStore()
+    for post_id in range(1, 60001):
+        store.upsert(post(post_id))
+
+    index = store.get("sitemap.xml").body
+    shards = sorted(store._shards)
+    assert shards == [0, 1]
+    for shard in shards:
+        body = store.get(sitemap_shard_name(shard)).body
+        assert sitemap_shard_name(shard).encode() in index
+        assert body.count(b"<url>") <= SITEMAP_URLS_PER_FILE
+    assert sum(store.get(sitemap_shard_name(shard)).body.count(b"<url>") for shard in shards) == 60000 + 2
@@ -0,0 +1,77 @@
+import json
+import threading
+import time
+
+import pytest
+
+from app import model_router as model_router_module
+from app.llm import TruncatedCompletion
+from app.model_router import DEFAULT_CATALOG, ModelRouter
+
+MESSAGES = [{"role": "user", "content": "Write a blog post about trail running shoes."}]
+
+
+def test_concurrent_calls_do_not_race_on_model_stats(monkeypatch):
+    monkeypatch.setattr(model_router_module, "chat_completion", lambda messages, model, **options: "text")
+    router = ModelRouter(DEFAULT_CATALOG)
+    errors = []
+
+    def hammer():
+        try:
+            for _ in range(400):
+                router.complete("description", MESSAGES)
+                router.status()
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=hammer) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert router.status()["description"]["models"]["gpt-4o-mini"]["calls"] == 500
+
+
+@pytest.mark.parametrize("first_answer", ["truncated", "invalid-json"])
+def test_unusable_answer_falls_through_to_the_next_model(monkeypatch, first_answer):
+    def chat_completion(messages, model, **options):
+        if model == "gpt-4o":
+            if first_answer == "truncated":
+                raise TruncatedCompletion("gpt-4o stopped at max_tokens")
+            return '{"title": "Trail Running Shoes", "content": "## Choosing'
+        return json.dumps({"title": "Trail Running Shoes", "content": "## Choosing a shoe"})
+
+    monkeypatch.setattr(model_router_module, "chat_completion", chat_completion)
+    router = ModelRouter(DEFAULT_CATALOG)
+
+    result, model = router.complete("blog", MESSAGES, parse=json.loads)
+
+    assert model == "gpt-4o-mini"
+    assert result["title"] == "Trail Running Shoes"
+    assert router.status()["blog"]["models"]["gpt-4o"]["error_rate"] == 1.0
+
+
+def test_call_past_the_latency_budget_times_out_and_falls_through(monkeypatch):
+    release = threading.Event()
+
+    def chat_completion(messages, model, **options):
+        if model == "gpt-4o":
+            release.wait(5)
+        return json.dumps({"title": "Trail Running Shoes", "content": "## Choosing a shoe"})
+
+    monkeypatch.setattr(model_router_module, "chat_completion", chat_completion)
+    catalog = json.loads(json.dumps(DEFAULT_CATALOG))
+    next(policy for policy in catalog["sections"] if policy["section"] == "blog")["p95_target_ms"] = 50
+    router = ModelRouter(catalog)
+
+    started = time.perf_counter()
+    try:
+        result, model = router.complete("blog", MESSAGES, parse=json.loads)
+    finally:
+        release.set()
+
+    assert model == "gpt-4o-mini"
+    assert time.perf_counter() - started < 1
+    assert router.status()["blog"]["models"]["gpt-4o"]["error_rate"] == 1.0
@@ -0,0 +1,60 @@
+import asyncio
+import logging
+import threading
+
+from app import profiling
+from app.profiling import RequestTimings, check_profiler_internals
+
+
+def test_installed_asyncio_and_anyio_support_every_profiling_feature(caplog):
+    async def scenario():
+        check_profiler_internals()
+        return profiling._loop_monitor()
+
+    with caplog.at_level(logging.ERROR, logger="app.profiling"):
+        monitor = asyncio.run(scenario())
+
+    # Failing here means an upgrade changed the internals the profiler relies on
+    assert profiling._WORKER_RUN_CODE is not None
+    assert monitor is not None
+    assert caplog.records == []
+
+
+def test_missing_internals_are_reported_and_switched_off(caplog, monkeypatch):
+    monkeypatch.setattr(profiling, "_WORKER_RUN_CODE", None)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        selector = loop._selector
+        loop._selector = None
+        try:
+            check_profiler_internals()
+            return profiling._loop_monitor()
+        finally:
+            loop._selector = selector
+
+    with caplog.at_level(logging.ERROR, logger="app.profiling"):
+        monitor = asyncio.run(scenario())
+
+    assert monitor is None
+    messages = " ".join(record.getMessage() for record in caplog.records)
+    assert "threadpool" in messages and "loop_wait" in messages
+
+
+def test_timings_stay_consistent_when_updated_from_several_threads():
+    timings = RequestTimings()
+
+    def work():
+        for _ in range(2000):
+            timings.enter("db")
+            timings.exit("db")
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    summary = timings.summary()
+    assert summary["db"] + summary["other"] <= summary["total"] + 0.01
+    assert timings._stack == []
@@ -0,0 +1,23 @@
+from types import SimpleNamespace
+
+from app.seo import score_generations, summarize_generations
+
+DESCRIPTION = (
+    "This waterproof trail shoe keeps your feet dry on wet paths. The trail shoe has a grippy sole and a light upper. "
+    "Lace it up for long hikes, muddy runs and rocky climbs. A waterproof lining stops rain and puddles from soaking in."
+)
+
+
+def generation(product_name):
+    return SimpleNamespace(id=1, product_name=product_name, product_description=DESCRIPTION,
+                           seo_keywords="trail shoe, waterproof", seo_score=None, seo_report=None)
+
+
+def test_generation_score_does_not_depend_on_product_name_length():
+    short, long = generation("Shoe"), generation("Waterproof Trail Shoe for Long Hikes and Muddy Runs")
+    score_generations([short, long])
+
+    assert short.seo_score == long.seo_score
+    assert "title_length" not in short.seo_report
+    assert not any(issue.startswith("Title") for issue in short.seo_report["issues"])
+    assert summarize_generations([short, long])["scored"] == 2
@@ -103,6 +103,9 @@ const HistoryList = ({ onSelectGeneration }) => {
               </h5>
 
               <div className="mb-2">
+                {generation.archived && (
+                  <span className="badge bg-light text-dark me-2">Archived</span>
+                )}
                 {generation.category && (
                   <span className="badge bg-secondary me-2">{generation.category}</span>
                 )}
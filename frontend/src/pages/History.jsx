@@ -6,8 +6,19 @@ import { generationAPI } from '../services/api';
 const History = () => {
   const [selectedGeneration, setSelectedGeneration] = useState(null);
 
-  const handleSelectGeneration = (generation) => {
-    setSelectedGeneration(generation);
+  const handleSelectGeneration = async (generation) => {
+    if (!generation.archived) {
+      setSelectedGeneration(generation);
+      return;
+    }
+    // History only lists archived generations; opening one restores the full content
+    try {
+      const response = await generationAPI.getGeneration(generation.id);
+      setSelectedGeneration(response.data);
+    } catch (error) {
+      console.error('Error loading archived generation:', error);
+      alert('Failed to load generation');
+    }
   };
 
   const handleBackToList = () => {